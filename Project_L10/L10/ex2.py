@@ -1,9 +1,13 @@
 import math
 import os
+import sys
 from typing import Dict, List, Tuple, Optional
 
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence, resolve_fasta
+
 
 # === Motifs (from your first exercise image) ===
 MOTIFS = [
@@ -23,14 +27,7 @@ BASES = "ACGT"
 
 
 def read_fasta(path: str) -> str:
-    seq_parts = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith(">"):
-                continue
-            seq_parts.append(line.upper())
-    return "".join(seq_parts)
+    return read_sequence(path).decode("ascii")
 
 
 def make_count_matrix(motifs: List[str]) -> Dict[str, List[int]]:
@@ -166,7 +163,7 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     for idx in range(1, 11):
-        fasta = os.path.join(script_dir, f"flu{idx}.fna")
+        fasta = resolve_fasta(os.path.join(script_dir, f"flu{idx}.fna"))
         if not os.path.exists(fasta):
             print(f"[SKIP] Missing {fasta}")
             continue
@@ -1,20 +1,16 @@
 import os
+import sys
 import matplotlib.pyplot as plt
 from collections import Counter
-import os
-import matplotlib.pyplot as plt
-from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence, resolve_fasta
 
 def sliding_windows(seq, win):
     return [seq[i:i+win] for i in range(len(seq) - win + 1)]
 
 def read_fasta(path):
-    seq = []
-    with open(path, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq.append(line.strip())
-    return "".join(seq).upper()
+    return read_sequence(resolve_fasta(path)).decode("ascii")
 
 def compute_cgsw_values(seq, win):
     counts = Counter(seq)
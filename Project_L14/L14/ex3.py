@@ -3,19 +3,17 @@ from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
+import sys
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence
+
 class GenomeUtils:
     @staticmethod
     def read_fasta(filename):
-        sequence = ""
         try:
-            with open(filename, 'r') as file:
-                for line in file:
-                    line = line.strip()
-                    if not line.startswith(">"):
-                        sequence += line
-            return sequence.upper()
+            return read_sequence(filename).decode('ascii')
         except FileNotFoundError:
             return None
 
@@ -1,52 +1,39 @@
-from itertools import product
+import os
+import sys
 
-S="TACGTGCGCGCGAGCTATCTACTGACTTACGACTAGTGTAGCTGCATCATCGATCGA"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from kmer_spectrum import kmer_spectrum
+from packed_seq import decode_kmer, kmers_to_ints
 
-def generate_combinations(length):
-    combinations = []
-    for p in product('ACGT', repeat = length):
-        combo = ""
-        for char in p:
-            combo += char
-        combinations.append(combo)
-    return combinations
+S="TACGTGCGCGCGAGCTATCTACTGACTTACGACTAGTGTAGCTGCATCATCGATCGA"
 
 
-def count_combinations(S, combinations, k):
+def count_combinations(S, k):
+    # dense spectrum: counts of all 4**k k-mers in ACGT order from one
+    # bincount, without building a string per combination
     total_substr = len(S) - k + 1
+    keys, counts = kmer_spectrum(S, k, dense=True)
+    return keys, counts, total_substr
 
-    counts = {}
-    for c in combinations:
-        counts[c] = 0
-
-    for i in range(total_substr):
-        substring = S[i:i+k]
-        if substring in counts:
-            counts[substring] += 1  
 
-    return counts, total_substr
+def calculate_percentages(counts, total_substr):
+    return (counts / total_substr) * 100
 
 
-def calculate_percentages(counts, total_substr):
-    percentages = {}
-    for c, count in counts.items():
-        percentages[c] = round((count / total_substr) * 100, 2)
-    return percentages
+def print_percentages(keys, percentages, k):
+    # labels are decoded only for the rows that are printed
+    for key, pct in zip(kmers_to_ints(keys), percentages.tolist()):
+        print(f"{decode_kmer(key, k)}: {round(pct, 2)}%")
 
 
-dinucleotides = generate_combinations(2)
-di_counts, di_total = count_combinations(S, dinucleotides, 2)
+di_keys, di_counts, di_total = count_combinations(S, 2)
 di_percentages = calculate_percentages(di_counts, di_total)
 
 print("Dinucleotide Percentages:")
-for dinucleotide, percentage in di_percentages.items():
-    print(f"{dinucleotide}: {percentage}%")
+print_percentages(di_keys, di_percentages, 2)
 
-trinucleotides = generate_combinations(3)
-tri_counts, tri_total = count_combinations(S, trinucleotides, 3)
+tri_keys, tri_counts, tri_total = count_combinations(S, 3)
 tri_percentages = calculate_percentages(tri_counts, tri_total)
 
 print("\nTrinucleotide Percentages:")
-for trinucleotide, percentage in tri_percentages.items():
-    print(f"{trinucleotide}: {percentage}%")
-
+print_percentages(tri_keys, tri_percentages, 3)
@@ -1,10 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence
+from kmer_cardinality import distinct_kmers, estimate_distinct
+
+SEQ_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sequence.fasta")
+KS = (3, 5, 8, 12, 16, 21, 31)
+
 def existing_combinations(S, k):
-    found = []
-    for i in range(len(S) - k + 1):
-        substring = S[i:i+k]
-        if substring not in found:
-            found.append(substring)
-    return found
+    # dict keys keep first-occurrence order with O(1) membership tests
+    return list(dict.fromkeys(S[i:i+k] for i in range(len(S) - k + 1)))
 
 S = "ABBA"
 
@@ -12,4 +18,13 @@ dinucleotides = existing_combinations(S, 2)
 trinucleotides = existing_combinations(S, 3)
 
 print("Dinucleotides:", dinucleotides)
-print("Trinucleotides:", trinucleotides)
\ No newline at end of file
+print("Trinucleotides:", trinucleotides)
+
+# DNA: packed k-mers in a hash set (exact) vs HyperLogLog (fixed memory)
+if os.path.exists(SEQ_PATH):
+    dna = read_sequence(SEQ_PATH)
+    estimates = estimate_distinct([dna], KS)
+    print(f"\nDistinct k-mers in {os.path.basename(SEQ_PATH)} ({len(dna)} bp):")
+    print(f"{'k':>3}  {'exact':>8}  {'HLL':>8}")
+    for k in KS:
+        print(f"{k:>3}  {len(distinct_kmers([dna], k)):>8}  {estimates[k].estimate():>8.0f}")
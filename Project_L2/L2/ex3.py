@@ -1,27 +1,26 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from collections import Counter
 import matplotlib.pyplot as plt
 import os
+import sys
 
-ALPHABET = {"A", "C", "G", "T"}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from base_windows import BaseWindows, moving_average
+from fasta_io import read_sequence
+from packed_seq import BASES
+
+MAX_PLOT_POINTS = 20000
 
 # -------- FASTA loading --------
 def load_fasta():
     path = filedialog.askopenfilename(
         title="Choose FASTA file",
-        filetypes=[("FASTA files", "*.fa *.fasta *.fna *.ffn *.frn"), ("All files", "*.*")]
+        filetypes=[("FASTA files", "*.fa *.fasta *.fna *.ffn *.frn *.gz"), ("All files", "*.*")]
     )
     if not path:
         return "", ""
     try:
-        parts = []
-        with open(path, "r") as f:
-            for line in f:
-                if line.startswith(">"):
-                    continue
-                parts.append(line.strip())
-        seq = "".join(parts).upper()
+        seq = read_sequence(path)
         if not seq:
             raise ValueError("No sequence content found.")
         return seq, path
@@ -31,52 +30,26 @@ def load_fasta():
 
 # -------- Sliding-window frequencies (A/C/G/T only) --------
 def sliding_window_freqs(sequence, window_size=30):
-    n = len(sequence)
-    if window_size <= 0:
-        raise ValueError("Window size must be a positive integer.")
-    if n < window_size:
-        raise ValueError(f"Sequence too short ({n}) for window size {window_size}.")
-
-    freqs = {b: [] for b in ALPHABET}
-    centers = []
-
-    for i in range(n - window_size + 1):
-        chunk = sequence[i:i+window_size]
-        counts = Counter(ch for ch in chunk if ch in ALPHABET)
-        denom = sum(counts[b] for b in ALPHABET)
-
-        if denom == 0:
-            for b in ALPHABET:
-                freqs[b].append(0.0)
-        else:
-            for b in ALPHABET:
-                freqs[b].append(counts[b] / denom)
-
-        # center position of window (1-based for readability)
-        centers.append(i + window_size // 2 + 1)
-
+    """Window centers and per-base frequency arrays; `sequence` may be a
+    string or an already built BaseWindows (no re-encoding then)."""
+    windows = sequence if isinstance(sequence, BaseWindows) else BaseWindows(sequence)
+    centers = windows.centers(window_size)
+    freqs = dict(zip(BASES, windows.freqs(window_size)))
     return centers, freqs
 
 # -------- Simple moving-average smoothing --------
 def smooth(values, window=5):
     """Centered moving average (handles edges by shrinking the window)."""
-    if window is None or window < 2:
-        return values
-    m = []
-    half = window // 2
-    n = len(values)
-    for i in range(n):
-        start = max(0, i - half)
-        end = min(n, i + half + 1)
-        m.append(sum(values[start:end]) / (end - start))
-    return m
+    return moving_average(values, window)
 
 # -------- Plotting --------
 def plot_freqs(x, freqs, title, smooth_window=5):
+    # smooth at full resolution, then thin out what matplotlib has to draw
+    stride = max(1, len(x) // MAX_PLOT_POINTS)
     plt.figure(figsize=(12, 6))
     for base in sorted(freqs.keys()):  # A, C, G, T
         y = smooth(freqs[base], smooth_window) if smooth_window and smooth_window > 1 else freqs[base]
-        plt.plot(x, y, label=base, linewidth=1.8, alpha=0.95)
+        plt.plot(x[::stride], y[::stride], label=base, linewidth=1.8, alpha=0.95)
 
     plt.title(title)
     plt.xlabel("Position (bp, window center)")
@@ -88,7 +61,10 @@ def plot_freqs(x, freqs, title, smooth_window=5):
     plt.show()
 
 # -------- GUI wiring --------
-def run_analysis(window_entry, smooth_entry):
+# the last opened file stays encoded, so new window sizes skip the FASTA parse
+loaded = {"windows": None, "path": ""}
+
+def read_params(window_entry, smooth_entry):
     # Parse window size
     try:
         w = int(window_entry.get())
@@ -96,7 +72,7 @@ def run_analysis(window_entry, smooth_entry):
             raise ValueError
     except ValueError:
         messagebox.showerror("Invalid input", "Window size must be a positive integer.")
-        return
+        return None
 
     # Parse smoothing window (allow 1 = no smoothing)
     try:
@@ -105,21 +81,40 @@ def run_analysis(window_entry, smooth_entry):
             raise ValueError
     except ValueError:
         messagebox.showerror("Invalid input", "Smoothing window must be an integer ≥ 1.")
-        return
+        return None
+    return w, sw
 
-    sequence, path = load_fasta()
-    if not sequence:
+def analyze_loaded(window_entry, smooth_entry):
+    if loaded["windows"] is None:
+        messagebox.showinfo("No file", "Choose a FASTA file first.")
+        return
+    params = read_params(window_entry, smooth_entry)
+    if params is None:
         return
+    w, sw = params
 
     try:
-        x, freqs = sliding_window_freqs(sequence, w)
+        x, freqs = sliding_window_freqs(loaded["windows"], w)
     except Exception as e:
         messagebox.showerror("Error", str(e))
         return
 
-    title = f"{os.path.basename(path)} — window={w}, smooth={sw}"
+    title = f"{os.path.basename(loaded['path'])} — window={w}, smooth={sw}"
     plot_freqs(x, freqs, title=title, smooth_window=sw)
 
+def run_analysis(window_entry, smooth_entry):
+    if read_params(window_entry, smooth_entry) is None:
+        return
+
+    sequence, path = load_fasta()
+    if not sequence:
+        return
+    loaded["windows"] = BaseWindows(sequence)
+    loaded["path"] = path
+    file_label.config(text=f"{os.path.basename(path)} ({len(sequence)} bp)")
+    reanalyze_btn.config(state="normal")
+    analyze_loaded(window_entry, smooth_entry)
+
 # -------- Main window --------
 root = tk.Tk()
 root.title("DNA Sliding-Window Frequency Analyzer")
@@ -140,4 +135,11 @@ smooth_entry.grid(row=0, column=3, padx=(0,12))
 btn = tk.Button(frm, text="Choose FASTA & Analyze", command=lambda: run_analysis(window_entry, smooth_entry))
 btn.grid(row=0, column=4)
 
+reanalyze_btn = tk.Button(frm, text="Re-analyze", state="disabled",
+                          command=lambda: analyze_loaded(window_entry, smooth_entry))
+reanalyze_btn.grid(row=0, column=5, padx=(6, 0))
+
+file_label = tk.Label(frm, text="No file loaded", anchor="w")
+file_label.grid(row=1, column=0, columnspan=6, sticky="w", pady=(8, 0))
+
 root.mainloop()
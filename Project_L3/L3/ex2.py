@@ -1,6 +1,18 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence
+from tm_track import TM_DTYPE, TmRows, TmTrack, parse_windows
+
+VISIBLE_ROWS = 25
+COLUMNS = (("window", "Length", 60), ("start", "Start", 100), ("sequence", "Window", 260),
+           ("tm_simple", "Tm_simple (°C)", 110), ("tm_advanced", "Tm_advanced (°C)", 120))
 
 def calculate_tm_simple(dna_seq):
     dna_seq = dna_seq.upper()
@@ -18,25 +30,94 @@ def calculate_tm_advanced(dna_seq, Na = 0.0001):
     return tm
 
 def sliding_window(dna_seq, window = 8):
+    track = TmTrack(dna_seq)
     tm_result = []
-    for start in range(len(dna_seq) - window + 1):
-        window_seq = dna_seq[start:start + window]
-        if all(c in 'ATGC' for c in window_seq):
-            tm = calculate_tm_simple(window_seq)
-            tm_adv = calculate_tm_advanced(window_seq)
-            tm_result.append((start + 1, window_seq, tm, tm_adv))
+    for w, starts, simple, adv in track.iter_chunks([window]):
+        seqs = track.window_seqs(starts, w).astype(str)
+        tm_result.extend(zip(starts.tolist(), seqs.tolist(), simple.tolist(), adv.tolist()))
     return tm_result
 
 def read_FASTA(filename):
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        seq = ''.join(line.strip() for line in lines if not line.startswith('>'))
-    return seq
+    return read_sequence(filename, upper=False).decode('ascii')
+
+
+class ResultTable(ttk.Frame):
+    """Fixed set of Treeview rows showing a slice of a TmRows or TM_DTYPE array;
+    scrolling only computes and rewrites the visible rows, whatever the number
+    of windows."""
+
+    def __init__(self, master, rows=VISIBLE_ROWS):
+        super().__init__(master)
+        self.page = rows
+        self.tree = ttk.Treeview(self, columns=[c for c, _, _ in COLUMNS], show="headings",
+                                 height=rows, selectmode="none")
+        for col, title, width in COLUMNS:
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=width, anchor="w" if col == "sequence" else "e")
+        self.items = [self.tree.insert("", "end", values=()) for _ in range(rows)]
+        self.bar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.bar.pack(side="left", fill="y")
+        for seq, step in (("<Button-4>", -3), ("<Button-5>", 3), ("<Up>", -1), ("<Down>", 1),
+                          ("<Prior>", -rows), ("<Next>", rows)):
+            self.tree.bind(seq, lambda _e, step=step: self.scroll_to(self.top + step))
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - 3 * int(e.delta / abs(e.delta or 1))))
+        self.tree.bind("<Home>", lambda _e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda _e: self.scroll_to(len(self.rows)))
+        self.track = None
+        self.rows = np.empty(0, dtype=TM_DTYPE)
+        self.top = 0
+
+    def set_rows(self, track, rows):
+        self.track = track
+        self.rows = rows
+        self.scroll_to(0)
+
+    def on_scroll(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * len(self.rows)))
+        elif action == "scroll":
+            step = int(args[0]) * (self.page if args[1] == "pages" else 1)
+            self.scroll_to(self.top + step)
+
+    def scroll_to(self, top):
+        n = len(self.rows)
+        self.top = max(0, min(top, n - self.page))
+        self.render()
+        return "break"
+
+    def jump(self, position):
+        """Scroll to the first window starting at or after `position` (1-based)."""
+        if isinstance(self.rows, TmRows):
+            self.scroll_to(self.rows.first_at(position))
+        else:
+            self.scroll_to(int(np.searchsorted(self.rows["start"], position)))
+
+    def render(self):
+        n = len(self.rows)
+        chunk = self.rows[self.top:self.top + self.page]
+        seqs = np.empty(len(chunk), dtype=object)
+        for w in np.unique(chunk["window"]):
+            sel = chunk["window"] == w
+            seqs[sel] = self.track.window_seqs(chunk["start"][sel], int(w)).astype(str)
+        for i, iid in enumerate(self.items):
+            if i < len(chunk):
+                r = chunk[i]
+                self.tree.item(iid, values=(int(r["window"]), int(r["start"]), seqs[i],
+                                            f"{r['tm_simple']}°C", f"{r['tm_advanced']:.2f}°C"))
+            else:
+                self.tree.item(iid, values=())
+        if n:
+            self.bar.set(self.top / n, (self.top + len(chunk)) / n)
+        else:
+            self.bar.set(0, 1)
+
+state = {"path": None, "track": None, "windows": None, "rows": None}
 
 def open_and_process():
     path = filedialog.askopenfilename(
         title="Select FASTA file",
-        filetypes=[("FASTA files", "*.fa *.fasta"), ("All files", "*.*")]
+        filetypes=[("FASTA files", "*.fa *.fasta *.gz"), ("All files", "*.*")]
     )
     if not path:
         return
@@ -45,31 +126,121 @@ def open_and_process():
     except Exception as e:
         messagebox.showerror("Error", f"Failed to read file:\n{e}")
         return
-    results = sliding_window(seq, window=8)
-    text_area.config(state="normal")
-    text_area.delete("1.0", "end")
-    text_area.insert("end", f"File: {path}\n")
-    text_area.insert("end", f"Sequence length: {len(seq)}\n")
-    text_area.insert("end", f"Windows (window=8): {len(results)}\n\n")
-    text_area.insert("end", "Start\tWindow\tTm_simple (°C)\tTm_advanced (°C)\n")
-    text_area.insert("end", "-" * 80 + "\n")
-    for start, wseq, tm, tm_adv in results:
-        adv_str = f"{tm_adv:.2f}°C" if tm_adv is not None else "N/A"
-        text_area.insert("end", f"{start}\t{wseq}\t{tm}°C\t{adv_str}\n")
-    if not results:
-        text_area.insert("end", "\nNo valid 8-nt windows with only A/T/G/C were found.\n")
-    text_area.config(state="disabled")
+    state["path"] = path
+    state["track"] = TmTrack(seq)
+    analyze()
+
+def analyze():
+    track = state["track"]
+    if track is None:
+        return
+    try:
+        windows = parse_windows(window_var.get())
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    # lazy and in position order: only the visible rows get computed
+    rows = track.rows(windows)
+    state["windows"] = windows
+    state["rows"] = rows
+    apply_filter()
+
+def parse_bound(text):
+    text = text.strip()
+    return float(text) if text else None
+
+def apply_filter():
+    rows = state["rows"]
+    if rows is None:
+        return
+    try:
+        lo = parse_bound(tm_min_var.get())
+        hi = parse_bound(tm_max_var.get())
+    except ValueError:
+        messagebox.showerror("Error", "Tm bounds must be numbers.")
+        return
+    shown = rows
+    if lo is not None or hi is not None:
+        shown = rows.filter(filter_col_var.get(), lo, hi)
+    table.set_rows(state["track"], shown)
+    label = window_var.get().strip()
+    info = f"File: {state['path']}  |  Sequence length: {len(state['track'])}  |  Windows (window={label}): {len(rows)}"
+    if len(shown) != len(rows):
+        info += f"  |  Shown: {len(shown)}"
+    if not len(rows):
+        info += f"  |  No valid {label}-nt windows with only A/T/G/C were found."
+    info_var.set(info)
+
+def jump_to():
+    try:
+        position = int(jump_var.get())
+    except ValueError:
+        messagebox.showerror("Error", "Position must be an integer.")
+        return
+    table.jump(position)
+
+def export_results():
+    track = state["track"]
+    if track is None or not state["windows"]:
+        messagebox.showinfo("Export", "Open and analyze a FASTA file first.")
+        return
+    path = filedialog.asksaveasfilename(
+        title="Export Tm table",
+        defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("Binary records", "*.bin"), ("All files", "*.*")]
+    )
+    if not path:
+        return
+    try:
+        if path.lower().endswith(".bin"):
+            rows = track.write_binary(path, state["windows"])
+        else:
+            rows = track.write_csv(path, state["windows"])
+    except OSError as e:
+        messagebox.showerror("Error", f"Failed to write file:\n{e}")
+        return
+    messagebox.showinfo("Export", f"Wrote {rows} windows to\n{path}")
 
 def create_gui():
+    global window_var, jump_var, filter_col_var, tm_min_var, tm_max_var, info_var, table
     root = tk.Tk()
-    root.title("Sliding-window Tm (window=8)")
+    root.title("Sliding-window Tm")
     frm = tk.Frame(root, padx=8, pady=8)
     frm.pack(fill="both", expand=True)
-    btn = tk.Button(frm, text="Select FASTA file...", command=open_and_process)
-    btn.pack(anchor="w")
-    global text_area
-    text_area = scrolledtext.ScrolledText(frm, width=100, height=24, state="disabled")
-    text_area.pack(fill="both", expand=True, pady=(8,0))
+    bar = tk.Frame(frm)
+    bar.pack(anchor="w")
+    btn = tk.Button(bar, text="Select FASTA file...", command=open_and_process)
+    btn.pack(side="left")
+    window_var = tk.StringVar(value="8")
+    tk.Label(bar, text="Window (e.g. 8 or 18-30):").pack(side="left", padx=(12, 4))
+    tk.Entry(bar, textvariable=window_var, width=10).pack(side="left")
+    tk.Button(bar, text="Re-analyze", command=analyze).pack(side="left", padx=(6, 0))
+    tk.Button(bar, text="Export...", command=export_results).pack(side="left", padx=(6, 0))
+
+    nav = tk.Frame(frm)
+    nav.pack(anchor="w", pady=(6, 0))
+    jump_var = tk.StringVar()
+    tk.Label(nav, text="Go to position:").pack(side="left")
+    jump_entry = tk.Entry(nav, textvariable=jump_var, width=12)
+    jump_entry.pack(side="left", padx=(4, 0))
+    jump_entry.bind("<Return>", lambda _e: jump_to())
+    tk.Button(nav, text="Go", command=jump_to).pack(side="left", padx=(4, 0))
+    filter_col_var = tk.StringVar(value="tm_advanced")
+    tk.Label(nav, text="Filter").pack(side="left", padx=(16, 4))
+    ttk.Combobox(nav, textvariable=filter_col_var, values=("tm_simple", "tm_advanced"),
+                 state="readonly", width=12).pack(side="left")
+    tm_min_var = tk.StringVar()
+    tm_max_var = tk.StringVar()
+    tk.Label(nav, text="from").pack(side="left", padx=(6, 4))
+    tk.Entry(nav, textvariable=tm_min_var, width=7).pack(side="left")
+    tk.Label(nav, text="to").pack(side="left", padx=(6, 4))
+    tk.Entry(nav, textvariable=tm_max_var, width=7).pack(side="left")
+    tk.Button(nav, text="Apply", command=apply_filter).pack(side="left", padx=(6, 0))
+
+    info_var = tk.StringVar(value="Select a FASTA file to begin.")
+    tk.Label(frm, textvariable=info_var, anchor="w").pack(fill="x", pady=(8, 0))
+    table = ResultTable(frm)
+    table.pack(fill="both", expand=True, pady=(4, 0))
     root.mainloop()
 
 if __name__ == "__main__":
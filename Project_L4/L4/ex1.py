@@ -1,46 +1,43 @@
-genetic_code = {
-    'UUU': 'Phe', 'UUC': 'Phe',
-    'UUA': 'Leu', 'UUG': 'Leu', 'CUU': 'Leu', 'CUC': 'Leu', 'CUA': 'Leu', 'CUG': 'Leu',
-    'AUU': 'Ile', 'AUC': 'Ile', 'AUA': 'Ile',
-    'AUG': 'Met',  
-    'GUU': 'Val', 'GUC': 'Val', 'GUA': 'Val', 'GUG': 'Val',
-    'UCU': 'Ser', 'UCC': 'Ser', 'UCA': 'Ser', 'UCG': 'Ser',
-    'CCU': 'Pro', 'CCC': 'Pro', 'CCA': 'Pro', 'CCG': 'Pro',
-    'ACU': 'Thr', 'ACC': 'Thr', 'ACA': 'Thr', 'ACG': 'Thr',
-    'GCU': 'Ala', 'GCC': 'Ala', 'GCA': 'Ala', 'GCG': 'Ala',
-    'UAU': 'Tyr', 'UAC': 'Tyr',
-    'UAA': 'Stop', 'UAG': 'Stop', 'UGA': 'Stop',
-    'CAU': 'His', 'CAC': 'His',
-    'CAA': 'Gln', 'CAG': 'Gln',
-    'AAU': 'Asn', 'AAC': 'Asn',
-    'AAA': 'Lys', 'AAG': 'Lys',
-    'GAU': 'Asp', 'GAC': 'Asp',
-    'GAA': 'Glu', 'GAG': 'Glu',
-    'UGU': 'Cys', 'UGC': 'Cys',
-    'UGG': 'Trp',
-    'CGU': 'Arg', 'CGC': 'Arg', 'CGA': 'Arg', 'CGG': 'Arg',
-    'AGU': 'Ser', 'AGC': 'Ser',
-    'AGA': 'Arg', 'AGG': 'Arg',
-    'GGU': 'Gly', 'GGC': 'Gly', 'GGA': 'Gly', 'GGG': 'Gly'
-}
+import os
+import sys
 
+import numpy as np
 
-def translate_to_protein(seq):
-    seq = seq.upper().replace('T', 'U')
-    protein = []
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from codons import (AMINO_ACIDS, IS_STOP, NO_CODON, base_codes, codon_indices, find_orfs,
+                    orf_proteins, translate_frames, write_protein_fasta)
+from fasta_io import iter_fasta, resolve_fasta
+
+MIN_ORF_LENGTH = 100  # amino acids
 
-    for i in range(0, len(seq) - 2, 3):
-        codon = seq[i:i+3]
-        amino_acid = genetic_code.get(codon, '')
 
-        if amino_acid == 'Stop':
-            break
-        if amino_acid:
-            protein.append(amino_acid)
-            
-    return '-'.join(protein)
+def translate_to_protein(seq):
+    idx = codon_indices(base_codes(seq))
+    stops = np.flatnonzero(IS_STOP[idx])
+    if len(stops):
+        idx = idx[:stops[0]]
+    return '-'.join(AMINO_ACIDS[c] for c in idx[idx != NO_CODON].tolist())
+
+def scan_fasta(path, min_length=MIN_ORF_LENGTH, out=None):
+    """Six-frame ORFs of every record of `path`, written as protein FASTA to `out`."""
+    out = out or os.path.splitext(path)[0] + ".orfs.faa"
+    total = 0
+    with open(out, "w", encoding="ascii") as f:
+        for name, seq in iter_fasta(resolve_fasta(path)):
+            name = name.split()[0] if name else "seq"
+            orfs = find_orfs(seq, min_length)
+            write_protein_fasta(f, orfs, orf_proteins(seq, orfs), name)
+            total += len(orfs)
+            stops = {fr: p.count(b"*") for fr, p in translate_frames(seq).items()}
+            print(f"{name}: {len(seq)} bp, {len(orfs)} ORFs >= {min_length} aa, stops per frame {stops}")
+    print(f"Wrote {total} proteins to {out}")
+    return out
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        min_length = int(sys.argv[2]) if len(sys.argv) > 2 else MIN_ORF_LENGTH
+        scan_fasta(sys.argv[1], min_length)
+        sys.exit()
     seq = input("Enter a DNA/RNA sequence: ")
     protein_output = translate_to_protein(seq)
     print("Translated Protein Sequence:", protein_output)
\ No newline at end of file
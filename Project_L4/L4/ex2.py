@@ -1,43 +1,42 @@
+import os
+import sys
 from collections import Counter
 import matplotlib.pyplot as plt
 
-genetic_code = {
-    'UUU': 'Phe', 'UUC': 'Phe',
-    'UUA': 'Leu', 'UUG': 'Leu', 'CUU': 'Leu', 'CUC': 'Leu', 'CUA': 'Leu', 'CUG': 'Leu',
-    'AUU': 'Ile', 'AUC': 'Ile', 'AUA': 'Ile',
-    'AUG': 'Met',  
-    'GUU': 'Val', 'GUC': 'Val', 'GUA': 'Val', 'GUG': 'Val',
-    'UCU': 'Ser', 'UCC': 'Ser', 'UCA': 'Ser', 'UCG': 'Ser',
-    'CCU': 'Pro', 'CCC': 'Pro', 'CCA': 'Pro', 'CCG': 'Pro',
-    'ACU': 'Thr', 'ACC': 'Thr', 'ACA': 'Thr', 'ACG': 'Thr',
-    'GCU': 'Ala', 'GCC': 'Ala', 'GCA': 'Ala', 'GCG': 'Ala',
-    'UAU': 'Tyr', 'UAC': 'Tyr',
-    'UAA': 'Stop', 'UAG': 'Stop', 'UGA': 'Stop',
-    'CAU': 'His', 'CAC': 'His',
-    'CAA': 'Gln', 'CAG': 'Gln',
-    'AAU': 'Asn', 'AAC': 'Asn',
-    'AAA': 'Lys', 'AAG': 'Lys',
-    'GAU': 'Asp', 'GAC': 'Asp',
-    'GAA': 'Glu', 'GAG': 'Glu',
-    'UGU': 'Cys', 'UGC': 'Cys',
-    'UGG': 'Trp',
-    'CGU': 'Arg', 'CGC': 'Arg', 'CGA': 'Arg', 'CGG': 'Arg',
-    'AGU': 'Ser', 'AGC': 'Ser',
-    'AGA': 'Arg', 'AGG': 'Arg',
-    'GGU': 'Gly', 'GGC': 'Gly', 'GGA': 'Gly', 'GGG': 'Gly'
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from codons import CODONS, amino_acid_counts, base_codes, codon_counts, codon_indices
+from codon_usage import CACHE_DIR, codon_usage, list_genomes, write_usage_csv
+from fasta_io import read_sequence, resolve_fasta
+
+WORKERS = os.cpu_count() or 1
 
 def read_fasta(filename):
-    with open(filename, 'r') as f:
-        lines = [line.strip() for line in f if not line.startswith('>')]
-    seq = ''.join(lines).upper().replace('T', 'U')
+    seq = read_sequence(resolve_fasta(filename)).decode('ascii').replace('T', 'U')
     return seq
 
 def count_codons_and_amino_acids(seq):
-    codons = [seq[i:i+3] for i in range(0, len(seq) - 2, 3)]
-    codon_counts = Counter(codons)
-    amino_acid_counts = Counter(genetic_code.get(c, '') for c in codons if genetic_code.get(c, '') not in ('', 'Stop'))
-    return codon_counts, amino_acid_counts
+    counts = codon_counts(codon_indices(base_codes(seq)))
+    codons = Counter({CODONS[i]: int(c) for i, c in enumerate(counts.tolist()) if c})
+    amino = Counter({aa: int(c) for aa, c in amino_acid_counts(counts).items() if c})
+    return codons, amino
+
+def batch_usage(source, workers=WORKERS):
+    """Codon usage of every genome in a directory or manifest, saved as codon_usage.csv next to it."""
+    paths = list_genomes(source)
+    if not paths:
+        print(f"No FASTA files found in {source}")
+        return None
+    base = source if os.path.isdir(source) else os.path.dirname(os.path.abspath(source))
+    usage = codon_usage(paths, workers, os.path.join(base, CACHE_DIR))
+    out = os.path.join(base, "codon_usage.csv")
+    write_usage_csv(out, usage)
+    for i, path in enumerate(usage.paths):
+        top = usage.counts[i].argsort()[::-1][:3]
+        aa = max(usage.aa_counts, key=lambda a: usage.aa_counts[a][i])
+        print(f"{os.path.basename(path)}: {usage.counts[i].sum()} codons, "
+              f"top {', '.join(CODONS[c] for c in top)}, most common amino acid {aa}")
+    print(f"Wrote {len(paths)} x {usage.counts.shape[1]} codon matrix to {out}")
+    return usage
 
 def plot_top10_codons(codon_counts, title):
     top10 = codon_counts.most_common(10)
@@ -49,6 +48,10 @@ def plot_top10_codons(codon_counts, title):
     plt.xticks(rotation=45)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        batch_usage(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else WORKERS)
+        sys.exit()
+
     covid_seq = read_fasta("covid19.fasta")
     flu_seq = read_fasta("influenza.fasta")
 
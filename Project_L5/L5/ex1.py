@@ -1,5 +1,18 @@
-import random
+import os
+import sys
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from assembly_eval import evaluate, format_evaluation, n50
+from checkpoint import cached_kmer_table, reads_digest
+from fasta_io import read_dna, resolve_fasta
+from kmer_count import count_kmers
+from packed_seq import BASES, MAX_K, PackedSeq, decode_kmer, encode, kmer_prefix, kmer_suffix, kmers_to_ints
+from read_sim import ReadSimulator
 
 SEQ_PATH = "sequence.fasta"
 READS_N = 2000
@@ -8,64 +21,57 @@ READ_MAX = 150
 KS_TO_TRY = (41, 51, 61, 71, 81, 91)
 MIN_KMER_COUNT = 2
 SEED = 42
-
-def read_fasta_single(path):
-    s = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.startswith(">"):
-                s.append(line.strip())
-    s = "".join(s).upper()
-    return "".join(c for c in s if c in "ACGT")
+WORKERS = os.cpu_count() or 1
+CHECKPOINT_DIR = None  # e.g. checkpoint.CHECKPOINT_DIR: keep the k-mer table of every K for later runs
 
 def write_fasta(seqs, path, prefix):
     with open(path, "w", encoding="utf-8") as f:
         for i, s in enumerate(seqs, 1):
-            f.write(f">{prefix}_{i}\n")
-            for j in range(0, len(s), 80):
-                f.write(s[j:j + 80] + "\n")
+            f.write(f">{prefix}_{i}\n" + "".join(s[j:j + 80] + "\n" for j in range(0, len(s), 80)))
+
+COMPLEMENT = str.maketrans("ACGT", "TGCA")
 
 def revcomp(s):
-    return s.translate(str.maketrans("ACGT", "TGCA"))[::-1]
+    return s.translate(COMPLEMENT)[::-1]
 
 def canonical_kmer(km):
     rc = revcomp(km)
     return km if km <= rc else rc
 
-def path_to_seq(nodes):
+def path_to_seq(nodes, k=None):
+    # nodes are (k-1)-mer strings, or packed ints when k is given
     if not nodes:
         return ""
-    seq = nodes[0]
-    for n in nodes[1:]:
-        seq += n[-1]
-    return seq
+    if k is None:
+        return nodes[0] + "".join(n[-1] for n in nodes[1:])
+    return decode_kmer(nodes[0], k - 1) + "".join(BASES[n & 3] for n in nodes[1:])
 
 def sample_reads(genome, n, min_len, max_len, seed=SEED):
-    random.seed(seed)
-    L = len(genome)
-    reads = []
-    for _ in range(n):
-        rlen = random.randint(min_len, max_len)
-        i = random.randint(0, L - rlen)
-        r = genome[i:i + rlen]
-        reads.append(r)
-    return reads
-
-def build_dbg(reads, k, canonical=False, min_kmer_count=2):
+    return list(ReadSimulator(genome, min_len, max_len, seed=seed).reads(n))
+
+def count_solid(reads, k, canonical=False, min_kmer_count=2, checkpoint=None):
+    """Solid k-mers: packed up to MAX_K, beyond that plain strings.
+    checkpoint: (directory, input hash) to reuse or save the packed k-mer table."""
+    if k <= MAX_K:
+        count = lambda: count_kmers(reads, k, canonical)
+        table = cached_kmer_table(*checkpoint, k, canonical, count) if checkpoint else count()
+        return table.solid(min_kmer_count)
     kc = Counter()
     for r in reads:
-        if len(r) < k: 
-            continue
+        r = str(r)
         for i in range(len(r) - k + 1):
-            km = r[i:i+k]
-            kc[km] += 1
+            kc[r[i:i+k]] += 1
+    return [km for km, c in kc.items() if c >= min_kmer_count]
+
+def graph_from_solid(solid, k):
+    if isinstance(solid, list):
+        pairs = ((km[:-1], km[1:]) for km in solid)
+    else:
+        pairs = zip(kmers_to_ints(kmer_prefix(solid, k)), kmers_to_ints(kmer_suffix(solid, k)))
     edges = defaultdict(list)
     indeg = Counter()
     outdeg = Counter()
-    for km, c in kc.items():
-        if c < min_kmer_count:
-            continue
-        u, v = km[:-1], km[1:]
+    for u, v in pairs:
         edges[u].append(v)
         outdeg[u] += 1
         indeg[v] += 1
@@ -73,72 +79,154 @@ def build_dbg(reads, k, canonical=False, min_kmer_count=2):
         _ = outdeg[v]
     return edges, indeg, outdeg
 
-def _pick_start(nodes, E, indeg, outdeg):
-    for n in nodes:
-        if outdeg[n] - indeg[n] == 1 and E.get(n):
-            return n
-    for n in nodes:
-        if E.get(n):
-            return n
-    return None
-
-def euler_all_contigs(edges):
-    E = {u: list(vs) for u, vs in edges.items()}
-    indeg = Counter()
-    outdeg = Counter()
-    for u, vs in E.items():
-        outdeg[u] += len(vs)
-        for v in vs:
-            indeg[v] += 1
-            _ = indeg[u]
-            _ = outdeg[v]
-    nodes = set(indeg) | set(outdeg)
-    contigs = []
-    while True:
-        s = _pick_start(nodes, E, indeg, outdeg)
-        if s is None:
-            break
+def build_dbg(reads, k, canonical=False, min_kmer_count=2, checkpoint=None):
+    # Nodes are packed (k-1)-mer ints, or (k-1)-mer strings when k > MAX_K.
+    return graph_from_solid(count_solid(reads, k, canonical, min_kmer_count, checkpoint), k)
+
+def euler_walks(edges, indeg=None, outdeg=None):
+    """Walks that use every edge once. edges maps a node to its successors
+    (a dict, or a list indexed by integer node ids 0..n-1); indeg/outdeg are
+    the degree Counters or arrays from build_dbg, computed when not given.
+    Nodes with one more out- than in-edge are tried as starts first, then
+    every other node; each candidate is looked at once, so the whole
+    traversal is linear in the number of edges."""
+    dense = not isinstance(edges, dict)
+    if dense:
+        E = [list(vs) for vs in edges]
+        nodes = range(len(E))
+    else:
+        E = {u: list(vs) for u, vs in edges.items()}
+        nodes = set(indeg) | set(outdeg) if indeg is not None else set(E).union(*E.values())
+        for n in nodes:
+            if n not in E:
+                E[n] = []
+    if indeg is None or outdeg is None:
+        indeg = [0] * len(E) if dense else dict.fromkeys(nodes, 0)
+        outdeg = [len(vs) for vs in E] if dense else {u: len(vs) for u, vs in E.items()}
+        for vs in (E if dense else E.values()):
+            for v in vs:
+                indeg[v] += 1
+    elif dense:
+        indeg = np.asarray(indeg).tolist()
+        outdeg = np.asarray(outdeg).tolist()
+    worklist = [n for n in nodes if outdeg[n] - indeg[n] == 1]
+    worklist.extend(nodes)
+    walks = []
+    for s in worklist:
+        if not E[s]:
+            continue
         st = [s]
         circuit = []
         while st:
-            v = st[-1]
-            if E.get(v) and E[v]:
-                st.append(E[v].pop())
+            out = E[st[-1]]
+            if out:
+                st.append(out.pop())
             else:
                 circuit.append(st.pop())
-                if not E.get(v):
-                    E.pop(v, None)
         circuit.reverse()
-        if len(circuit) > 1:
-            contigs.append(path_to_seq(circuit))
+        walks.append(circuit)
+    return walks
+
+def euler_all_contigs(edges, k=None, indeg=None, outdeg=None):
+    contigs = [path_to_seq(walk, k) for walk in euler_walks(edges, indeg, outdeg) if len(walk) > 1]
     contigs.sort(key=len, reverse=True)
     return contigs
 
-def assemble_best(reads, ks=KS_TO_TRY, min_kmer_count=MIN_KMER_COUNT):
+def assembly_score(contigs):
+    lengths = [len(c) for c in contigs]
+    return n50(lengths), sum(lengths)
+
+# Reads are shared with the workers as one 2-bit packed buffer plus offsets;
+# each worker maps the buffer once and slices PackedSeq views out of it.
+def pack_reads(reads):
+    data = PackedSeq.from_codes(encode("".join(reads))).data
+    offsets = np.zeros(len(reads) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in reads], out=offsets[1:])
+    return data, offsets
+
+def _read_views(buf, offsets):
+    data = np.frombuffer(buf, dtype=np.uint8)
+    return [PackedSeq(data, int(a), int(b - a)) for a, b in zip(offsets[:-1], offsets[1:])]
+
+_shm = None
+_reads = None
+
+def _init_worker(shm_name, offsets):
+    global _shm, _reads
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _reads = _read_views(_shm.buf, offsets)
+
+def _assemble_k(k, min_kmer_count, checkpoint=None):
+    edges, indeg, outdeg = build_dbg(_reads, k=k, canonical=False, min_kmer_count=min_kmer_count,
+                                     checkpoint=checkpoint)
+    return k, euler_all_contigs(edges, None if k > MAX_K else k, indeg, outdeg) if edges else []
+
+def iter_assemblies(reads, ks=KS_TO_TRY, min_kmer_count=MIN_KMER_COUNT, workers=WORKERS, checkpoint_dir=None):
+    """Yield (k, contigs) for every usable k, in order of completion. With a
+    checkpoint_dir the k-mer table of every k is saved there (tagged with the
+    hash of the reads) and reloaded instead of recounted on later runs."""
+    ks = [k for k in ks if 2 <= k < min(len(r) for r in reads)] if reads else []
+    if not ks:
+        return
+    checkpoint = (checkpoint_dir, reads_digest(reads)) if checkpoint_dir else None
+    global _reads
+    data, offsets = pack_reads(reads)
+    if workers <= 1 or len(ks) == 1:
+        _reads = _read_views(data, offsets)
+        try:
+            for k in ks:
+                yield _assemble_k(k, min_kmer_count, checkpoint)
+        finally:
+            _reads = None
+        return
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        np.frombuffer(shm.buf, dtype=np.uint8)[:data.nbytes] = data
+        with ProcessPoolExecutor(max_workers=min(workers, len(ks)), initializer=_init_worker,
+                                 initargs=(shm.name, offsets)) as pool:
+            # largest k first: its graph is the smallest, so results start early
+            futures = [pool.submit(_assemble_k, k, min_kmer_count, checkpoint) for k in sorted(ks, reverse=True)]
+            for fut in as_completed(futures):
+                yield fut.result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+def assemble_best(reads, ks=KS_TO_TRY, min_kmer_count=MIN_KMER_COUNT, workers=WORKERS, report=None,
+                  checkpoint_dir=None):
+    # best k: highest N50, then largest total length, then longest contig;
+    # ties go to the smaller k so the answer does not depend on finish order
     best_contigs = []
     best_k = None
-    for k in ks:
-        if k < 2 or k >= READ_MIN:
+    best_score = None
+    for k, contigs in iter_assemblies(reads, ks, min_kmer_count, workers, checkpoint_dir):
+        if report:
+            report(k, contigs)
+        if not contigs:
             continue
-        edges, indeg, outdeg = build_dbg(reads, k=k, canonical=False, min_kmer_count=min_kmer_count)
-        if not edges:
-            continue
-        contigs = euler_all_contigs(edges)
-        if contigs and (not best_contigs or len(contigs[0]) > len(best_contigs[0])):
-            best_contigs = contigs
-            best_k = k
+        score = assembly_score(contigs) + (len(contigs[0]), -k)
+        if best_score is None or score > best_score:
+            best_contigs, best_k, best_score = contigs, k, score
     return best_k, best_contigs
 
+def print_assembly(k, contigs):
+    n50_len, total = assembly_score(contigs)
+    longest = len(contigs[0]) if contigs else 0
+    print(f"K={k}: {len(contigs)} contigs, N50 {n50_len}, total {total}, longest {longest}")
+
 def main():
-    genome = read_fasta_single(SEQ_PATH)
+    genome = read_dna(resolve_fasta(SEQ_PATH))
     if not genome:
         print(f"Could not read a DNA sequence from {SEQ_PATH}.")
         return
     print("Input sequence length:", len(genome))
-    reads = sample_reads(genome, READS_N, READ_MIN, READ_MAX, seed=SEED)
-    write_fasta(reads, "reads.fasta", "read")
+    batch = ReadSimulator(genome, READ_MIN, READ_MAX, seed=SEED).batch(READS_N)
+    with open("reads.fasta", "wb") as f:
+        f.write(batch.to_fasta())
+    reads = batch.seqs()
     print(f"Sampled {len(reads)} reads (len {READ_MIN}-{READ_MAX}).")
-    best_k, contigs = assemble_best(reads, ks=KS_TO_TRY, min_kmer_count=MIN_KMER_COUNT)
+    best_k, contigs = assemble_best(reads, ks=KS_TO_TRY, min_kmer_count=MIN_KMER_COUNT, report=print_assembly,
+                                   checkpoint_dir=CHECKPOINT_DIR)
     if not contigs:
         print("No contigs assembled. Try a smaller K, lower MIN_KMER_COUNT, or longer reads.")
         return
@@ -146,17 +234,9 @@ def main():
     print(f"Best K: {best_k}")
     print("Assembled contigs:", len(contigs))
     print("Longest contig length:", len(contigs[0]))
-    genome_rc = revcomp(genome)
-    contig = contigs[0]
-    print("Forward rotation:", contig in (genome + genome))
-    print("Reverse rotation:", contig in (genome_rc + genome_rc))
-    print("Δ length:", len(genome) - len(contig))
-    approx_input_len = len(genome)
-    longest = len(contigs[0])
-    if abs(longest - approx_input_len) <= 20:
-        print("Longest contig matches the input length (±20 bp). Likely a perfect rebuild (or rotation).")
-    else:
-        print("Longest contig differs from input length. Likely repeats caused fragmentation or branching.")
+    # contigs are placed on the (circular) input through unique k-mer anchors
+    # instead of substring checks against the doubled genome
+    print(format_evaluation(evaluate(contigs, genome, circular=True)))
 
 if __name__ == "__main__":
     main()
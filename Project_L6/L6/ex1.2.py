@@ -1,7 +1,10 @@
-import os, math, random
+import os, sys, math, random
 from collections import namedtuple
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_dna
+
 N_FRAGS = 10
 FRAG_MIN = 100
 FRAG_MAX = 3000
@@ -12,15 +15,6 @@ EXCLUDE = {"fragments.fasta", "sequence.fasta"}
 
 Fragment = namedtuple("Fragment", ["name", "start", "length", "seq"])
 
-def read_fasta_single(path):
-    s=[]
-    with open(path,"r",encoding="utf-8") as f:
-        for line in f:
-            if not line.startswith(">"):
-                s.append(line.strip())
-    s="".join(s).upper()
-    return "".join(c for c in s if c in "ACGT")
-
 def sample_fragments(genome, n, min_len, max_len, seed=SEED):
     random.seed(seed)
     L=len(genome)
@@ -82,7 +76,7 @@ def plot_gel(lanes, img_path):
     plt.close(fig)
 
 def main():
-    fasta_files=[f for f in os.listdir(".") if f.endswith(".fasta") and f not in EXCLUDE]
+    fasta_files=[f for f in os.listdir(".") if f.endswith((".fasta", ".fasta.gz")) and f.removesuffix(".gz") not in EXCLUDE]
     if not fasta_files:
         print("No FASTA files found.")
         return
@@ -90,7 +84,7 @@ def main():
     rows=[]
     lanes=[]
     for fname in sorted(fasta_files):
-        seq=read_fasta_single(fname)
+        seq=read_dna(fname)
         if not seq:
             continue
         frags=sample_fragments(seq, N_FRAGS, FRAG_MIN, FRAG_MAX, seed=SEED)
@@ -1,8 +1,11 @@
-import random, math, os
+import random, math, os, sys
 from collections import namedtuple
 import matplotlib.pyplot as plt
 
-SEQ_PATH = os.path.join(os.path.dirname(__file__), "sequence.fasta")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_dna, resolve_fasta
+
+SEQ_PATH = resolve_fasta(os.path.join(os.path.dirname(__file__), "sequence.fasta"))
 N_FRAGS = 10
 FRAG_MIN = 100
 FRAG_MAX = 3000
@@ -12,15 +15,6 @@ OUT_IMG = "gel.png"
 
 Fragment = namedtuple("Fragment", ["name", "start", "length", "seq"])
 
-def read_fasta_single(path):
-    s = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.startswith(">"):
-                s.append(line.strip())
-    s = "".join(s).upper()
-    return "".join(c for c in s if c in "ACGT")
-
 def write_fasta(frags, path):
     with open(path, "w", encoding="utf-8") as f:
         for fr in frags:
@@ -103,7 +97,7 @@ def main():
     if not os.path.exists(SEQ_PATH):
         print(f"Missing {SEQ_PATH}. Put a 1–3 kb sequence there first.")
         return
-    genome = read_fasta_single(SEQ_PATH)
+    genome = read_dna(SEQ_PATH)
     if not genome:
         print("Could not read a DNA sequence from sequence.fasta.")
         return
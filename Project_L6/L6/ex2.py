@@ -1,7 +1,10 @@
-import os, math, re
+import os, sys, math, re
 import matplotlib.pyplot as plt
 
-SEQ_PATH = os.path.join(os.path.dirname(__file__), "sequence.fasta")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_dna, resolve_fasta
+
+SEQ_PATH = resolve_fasta(os.path.join(os.path.dirname(__file__), "sequence.fasta"))
 OUT_CSV  = "digest_fragments.csv"
 OUT_IMG  = "gel_digest.png"
 
@@ -13,15 +16,6 @@ ENZYMES = [
     ("NotI",   "GCGGCCGC", 2),
 ]
 
-def read_fasta_single(path):
-    s=[]
-    with open(path,"r",encoding="utf-8") as f:
-        for line in f:
-            if not line.startswith(">"):
-                s.append(line.strip())
-    s="".join(s).upper()
-    return "".join(c for c in s if c in "ACGT")
-
 def revcomp(s):
     return s.translate(str.maketrans("ACGT","TGCA"))[::-1]
 
@@ -97,7 +91,7 @@ def main():
     if not os.path.exists(SEQ_PATH):
         print(f"Missing {SEQ_PATH}.")
         return
-    seq = read_fasta_single(SEQ_PATH)
+    seq = read_dna(SEQ_PATH)
     if not seq:
         print("Empty or invalid FASTA.")
         return
@@ -1,13 +1,13 @@
+import os
+import sys
 from collections import Counter
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence, resolve_fasta
+
 def read_fasta(filename):
-    sequence = []
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                sequence.append(line.strip())
-    return "".join(sequence)
+    return read_sequence(resolve_fasta(filename), upper=False).decode("ascii")
 
 def find_tandem_repeats(sequence, min_len=3, max_len=10):
     results = []
@@ -1,14 +1,13 @@
 import os
+import sys
 from collections import Counter
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import read_sequence, resolve_fasta
+
 def read_fasta(filename):
-    sequence = []
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                sequence.append(line.strip())
-    return "".join(sequence)
+    return read_sequence(filename, upper=False).decode("ascii")
 
 def find_tandem_repeats(sequence, min_len=3, max_len=10):
     results = []
@@ -54,7 +53,7 @@ def plot_tandem_repeats(repeats, genome_name):
 
 def process_all_genomes():
     for i in range(1, 11):
-        filename = f"flu{i}.fna"
+        filename = resolve_fasta(f"flu{i}.fna")
         if not os.path.exists(filename):
             print(f"{filename} not found.")
             continue
@@ -1,3 +1,10 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from fasta_io import iter_fasta
+
+
 def reverse_complement(seq):
     table = str.maketrans("ACGTacgt", "TGCAtgca")
     return seq.translate(table)[::-1]
@@ -5,18 +12,12 @@ def reverse_complement(seq):
 
 def read_fasta(path):
     header = None
-    seq_parts = []
-    with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is None:
-                    header = line[1:]
-            else:
-                seq_parts.append(line)
-    return "".join(seq_parts), (header if header is not None else path)
+    seq = bytearray()
+    for name, part in iter_fasta(path):
+        if header is None and name:
+            header = name
+        seq += part
+    return seq.decode("ascii"), (header if header is not None else path)
 
 
 def find_inverted_repeats_sliding(seq, offset=0,
@@ -0,0 +1,159 @@
+from collections import namedtuple
+
+import numpy as np
+
+from kmer_count import run_starts
+from packed_seq import encode, kmer_codes, revcomp_kmers, valid_windows
+
+EVAL_K = 25
+MISASSEMBLY_GAP = 1000  # larger jumps along the reference (or a strand flip) break an alignment
+
+Evaluation = namedtuple("Evaluation", "contigs total_length largest n50 ng50 aligned unaligned genome_fraction "
+                                      "duplication_ratio misassemblies breakpoints")
+# contig index, 0-based position in the contig where the next alignment starts, and the kind of break
+Breakpoint = namedtuple("Breakpoint", "contig position kind")
+
+
+def nx(lengths, fraction, total=None):
+    """Length L such that contigs of length >= L add up to fraction * total
+    (default: the assembly length); 0 if they never do."""
+    lengths = np.sort(np.asarray(lengths, dtype=np.int64))[::-1]
+    total = lengths.sum() if total is None else total
+    if not len(lengths) or total <= 0:
+        return 0
+    i = int(np.searchsorted(np.cumsum(lengths), fraction * total))
+    return int(lengths[i]) if i < len(lengths) else 0
+
+
+def n50(lengths):
+    return nx(lengths, 0.5)
+
+
+def ng50(lengths, genome_length):
+    return nx(lengths, 0.5, genome_length)
+
+
+class ReferenceIndex:
+    """Positions of the canonical k-mers that occur once in a reference
+    (counting both strands), with the strand they were seen on. Built once,
+    then any number of contigs are mapped with one sorted search."""
+
+    def __init__(self, genome, k=EVAL_K, circular=False):
+        if not 1 <= k <= 32:
+            raise ValueError("ReferenceIndex handles 1 <= k <= 32")
+        self.k = k
+        self.circular = circular
+        codes = encode(genome)
+        self.length = len(codes)
+        if circular:
+            codes = np.concatenate([codes, codes[:k - 1]])
+        pos = np.flatnonzero(valid_windows(codes, k))
+        fwd = kmer_codes(codes, k)[pos]
+        kmers = np.minimum(fwd, revcomp_kmers(fwd, k))
+        order = np.argsort(kmers, kind="stable")
+        kmers, pos = kmers[order], pos[order]
+        # repeated k-mers do not tell where a contig belongs: keep unique anchors only
+        starts = run_starts(kmers)
+        sizes = np.diff(np.append(starts, len(kmers)))
+        unique = starts[sizes == 1]
+        self.keys = kmers[unique]
+        self.positions = pos[unique]
+        self.forward = (fwd[order] == kmers)[unique]
+
+    def lookup(self, kmers):
+        """(reference position, reverse strand) of every k-mer; the position
+        is -1 where the k-mer is not a unique anchor."""
+        ref = np.full(len(kmers), -1, dtype=np.int64)
+        rev = np.zeros(len(kmers), dtype=bool)
+        if not len(self.keys) or not len(kmers):
+            return ref, rev
+        canon = np.minimum(kmers, revcomp_kmers(kmers, self.k))
+        # sorted queries turn the binary searches into a near-linear merge
+        order = np.argsort(canon)
+        i = np.searchsorted(self.keys, canon[order])
+        i[i == len(self.keys)] = 0
+        hit = self.keys[i] == canon[order]
+        ref[order[hit]] = self.positions[i[hit]]
+        rev[order[hit]] = (canon[order[hit]] == kmers[order[hit]]) != self.forward[i[hit]]
+        return ref, rev
+
+    def anchors(self, contigs):
+        """(contig id, contig offset, reference position, reverse strand) of
+        every contig k-mer that hits a unique reference k-mer, in contig order."""
+        k = self.k
+        lengths = np.array([len(c) for c in contigs], dtype=np.int64)
+        # one INVALID base between contigs keeps k-mers from spanning two of them
+        codes = encode("N".join(contigs))
+        first = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        ok = np.flatnonzero(valid_windows(codes, k))
+        fwd = kmer_codes(codes, k)[ok]
+        cid = np.searchsorted(first, ok, side="right") - 1
+        off = ok - first[cid]
+        ref, rev = self.lookup(fwd)
+        keep = ref >= 0
+        return cid[keep], off[keep], ref[keep], rev[keep]
+
+
+def _wrap(delta, length):
+    delta = np.abs(delta)
+    return np.minimum(delta, length - delta) if length else delta
+
+
+def evaluate(contigs, reference, k=EVAL_K, circular=False, gap=MISASSEMBLY_GAP):
+    """Evaluation of `contigs` against `reference` (a sequence or a
+    ReferenceIndex): N50, NG50, genome fraction, duplication ratio and the
+    misassembly breakpoints found from unique k-mer anchors."""
+    index = reference if isinstance(reference, ReferenceIndex) else ReferenceIndex(reference, k, circular)
+    k = index.k
+    L = index.length
+    lengths = np.array([len(c) for c in contigs], dtype=np.int64)
+    cid, off, ref, rev = index.anchors(contigs)
+    # along one alignment the diagonal is constant: ref - off forward,
+    # ref + off on the reverse strand (up to small indels)
+    diag = np.where(rev, ref + off, ref - off)
+    if index.circular:
+        diag %= L
+    new_block = np.ones(len(cid), dtype=bool)
+    if len(cid) > 1:
+        same = (cid[1:] == cid[:-1]) & (rev[1:] == rev[:-1])
+        close = _wrap(diag[1:] - diag[:-1], L if index.circular else 0) <= gap
+        new_block[1:] = ~(same & close)
+    block_starts = np.flatnonzero(new_block)
+    breakpoints = []
+    for b in block_starts[1:].tolist():
+        if cid[b] == cid[b - 1]:
+            kind = "inversion" if rev[b] != rev[b - 1] else "relocation"
+            breakpoints.append(Breakpoint(int(cid[b]), int(off[b]), kind))
+    # aligned contig span of every block; reference bases covered by any anchor
+    span = 0
+    if len(block_starts):
+        block_ends = np.append(block_starts[1:], len(cid)) - 1
+        span = int((off[block_ends] - off[block_starts] + k).sum())
+    marks = np.bincount(ref, minlength=L + 2 * k) - np.bincount(ref + k, minlength=L + 2 * k)
+    covered = np.cumsum(marks) > 0
+    if index.circular:
+        covered[:len(covered) - L] |= covered[L:]
+    covered_bases = int(np.count_nonzero(covered[:L]))
+    aligned = int(len(np.unique(cid)))
+    return Evaluation(
+        contigs=len(contigs),
+        total_length=int(lengths.sum()),
+        largest=int(lengths.max()) if len(lengths) else 0,
+        n50=nx(lengths, 0.5),
+        ng50=nx(lengths, 0.5, L),
+        aligned=aligned,
+        unaligned=len(contigs) - aligned,
+        genome_fraction=covered_bases / L if L else 0.0,
+        duplication_ratio=span / covered_bases if covered_bases else 0.0,
+        misassemblies=len(breakpoints),
+        breakpoints=breakpoints,
+    )
+
+
+def format_evaluation(ev):
+    return "\n".join([
+        f"Contigs: {ev.contigs} ({ev.aligned} aligned, {ev.unaligned} unaligned), total {ev.total_length} bp",
+        f"Largest: {ev.largest}  N50: {ev.n50}  NG50: {ev.ng50}",
+        f"Genome fraction: {100 * ev.genome_fraction:.2f}%  Duplication ratio: {ev.duplication_ratio:.3f}",
+        f"Misassemblies: {ev.misassemblies}",
+    ] + [f"  contig {b.contig + 1} at {b.position}: {b.kind}" for b in ev.breakpoints[:20]])
@@ -0,0 +1,77 @@
+import numpy as np
+
+from packed_seq import BASES, encode
+
+
+class BaseWindows:
+    """Per-base prefix sums over a sequence (a cumulative one-hot encoding).
+
+    The A/C/G/T counts of any window are a difference of two prefix
+    entries, so a full track costs O(n) whatever the window size, and a new
+    window size needs no re-reading of the sequence."""
+
+    def __init__(self, seq):
+        codes = encode(seq)
+        self.n = len(codes)
+        dtype = np.int32 if self.n < 2**31 else np.int64
+        self.prefix = np.zeros((len(BASES), self.n + 1), dtype=dtype)
+        for b in range(len(BASES)):
+            np.cumsum(codes == b, out=self.prefix[b, 1:])
+
+    def __len__(self):
+        return self.n
+
+    def totals(self):
+        return dict(zip(BASES, self.prefix[:, -1].tolist()))
+
+    def starts(self, window, step=1):
+        if window <= 0:
+            raise ValueError("Window size must be a positive integer.")
+        if self.n < window:
+            raise ValueError(f"Sequence too short ({self.n}) for window size {window}.")
+        return np.arange(0, self.n - window + 1, step)
+
+    def counts(self, window, step=1):
+        """(4, m) A/C/G/T counts of every window; anything else is skipped."""
+        s = self.starts(window, step)
+        if step == 1:
+            return self.range_counts(window, 0, len(s))
+        return self.prefix[:, s + window] - self.prefix[:, s]
+
+    def range_counts(self, window, lo, hi):
+        """(4, hi - lo) counts of the windows starting at lo .. hi - 1."""
+        return self.prefix[:, lo + window:hi + window] - self.prefix[:, lo:hi]
+
+    def centers(self, window, step=1):
+        """1-based center position of every window."""
+        return self.starts(window, step) + window // 2 + 1
+
+    def freqs(self, window, step=1):
+        """(4, m) relative A/C/G/T frequencies; all zero where a window has
+        no A/C/G/T at all."""
+        c = self.counts(window, step)
+        denom = c.sum(axis=0)
+        np.maximum(denom, 1, out=denom)
+        return np.divide(c, denom, dtype=np.float64)
+
+
+def moving_average(values, window):
+    """Centered moving average along the last axis, shrinking the window at
+    the edges; O(n) through a cumulative sum."""
+    values = np.asarray(values, dtype=np.float64)
+    if window is None or window < 2:
+        return values
+    n = values.shape[-1]
+    half = window // 2
+    csum = np.zeros(values.shape[:-1] + (n + 1,))
+    np.cumsum(values, axis=-1, out=csum[..., 1:])
+    out = np.empty_like(values)
+    # interior points see a full window: plain slices, no gather
+    lo, hi = half, n - half - 1
+    if lo < hi:
+        out[..., lo:hi] = (csum[..., lo + half + 1:hi + half + 1] - csum[..., :hi - half]) / (2 * half + 1)
+    edges = np.r_[0:min(lo, n), max(hi, lo, 0):n]
+    start = np.maximum(0, edges - half)
+    end = np.minimum(n, edges + half + 1)
+    out[..., edges] = (csum[..., end] - csum[..., start]) / (end - start)
+    return out
@@ -0,0 +1,68 @@
+import random
+import time
+
+import ex1
+from debruijn import compact_graph, euler_unitig_paths
+from fasta_io import read_dna, resolve_fasta
+
+SYNTH_LEN = 5_000_000
+SYNTH_COVERAGE = 8
+SYNTH_SEED = 7
+
+def random_genome(length, seed=SYNTH_SEED):
+    rng = random.Random(seed)
+    return "".join(rng.choices("ACGT", k=length))
+
+def reads_for_coverage(length, coverage):
+    return max(1, length * coverage * 2 // (ex1.READ_MIN + ex1.READ_MAX))
+
+def bench(label, genome, n_reads, k=ex1.K, canonical=True):
+    reads = ex1.sample_reads(genome, n_reads, ex1.READ_MIN, ex1.READ_MAX)
+
+    t0 = time.perf_counter()
+    edges, indeg, outdeg = ex1.build_dbg(reads, k, canonical, ex1.MIN_KMER_COUNT)
+    t_build = time.perf_counter() - t0
+    n_edges = sum(len(vs) for vs in edges.values())
+
+    # previous assemble_contigs: one graph node per (k-1)-mer
+    t0 = time.perf_counter()
+    node_contigs = [ex1.path_to_seq(p, k) for p in ex1.euler_paths(edges, indeg, outdeg)]
+    t_nodes = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    graph = compact_graph(edges, indeg, outdeg, k)
+    t_compact = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    unitig_contigs = [graph.path_to_seq(p) for p in euler_unitig_paths(graph)]
+    t_unitigs = time.perf_counter() - t0
+
+    print(f"== {label}: {len(genome)} bp, {len(reads)} reads, k={k}, canonical={canonical}")
+    print(f"build_dbg          {t_build:9.3f} s  ({len(indeg)} nodes, {n_edges} edges)")
+    print(f"node traversal     {t_nodes:9.3f} s  ({len(node_contigs)} contigs, "
+          f"longest {max(map(len, node_contigs), default=0)})")
+    print(f"compaction         {t_compact:9.3f} s  ({len(graph)} unitigs)")
+    print(f"unitig traversal   {t_unitigs:9.3f} s  ({len(unitig_contigs)} contigs, "
+          f"longest {max(map(len, unitig_contigs), default=0)})")
+    speedup = t_nodes / max(t_compact + t_unitigs, 1e-9)
+    print(f"speed-up (traversal incl. compaction): {speedup:.2f}x\n")
+    return speedup
+
+def main():
+    # ex1 assembles canonical k-mers, which splits the graph at every strand
+    # switch; the stranded graph shows what compaction does to long paths.
+    # assemble_contigs therefore compacts only the stranded graph (COMPACT = None).
+    genome = read_dna(resolve_fasta(ex1.SEQ_PATH))
+    synth = random_genome(SYNTH_LEN)
+    rows = []
+    for canonical in (True, False):
+        for label, seq, n_reads in (("sequence.fasta", genome, ex1.READS_N),
+                                    (f"synthetic {SYNTH_LEN / 1e6:g} Mb", synth,
+                                     reads_for_coverage(SYNTH_LEN, SYNTH_COVERAGE))):
+            rows.append((label, canonical, bench(label, seq, n_reads, canonical=canonical)))
+    print("compaction + unitig traversal vs node traversal (<1x is a slowdown):")
+    for label, canonical, speedup in rows:
+        mode = "canonical (ex1 default, walks nodes)" if canonical else "stranded (compacted)"
+        print(f"  {label:<20} {mode:<38} {speedup:6.2f}x")
+
+if __name__ == "__main__":
+    main()
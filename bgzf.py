@@ -0,0 +1,224 @@
+import io
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+GZIP_MAGIC = b"\x1f\x8b"
+HEADER_SIZE = 18
+PREFETCH_BLOCKS = 64
+
+
+def _parse_header(header):
+    # 18 bytes: gzip header with FEXTRA set and a single "BC" subfield holding BSIZE
+    if len(header) < HEADER_SIZE or header[:2] != GZIP_MAGIC or header[2] != 8 or not header[3] & 4:
+        return None
+    xlen = struct.unpack_from("<H", header, 10)[0]
+    if xlen != 6 or header[12:14] != b"BC":
+        return None
+    return struct.unpack_from("<H", header, 16)[0] + 1
+
+
+def is_bgzf(path):
+    with open(path, "rb") as f:
+        return _parse_header(f.read(HEADER_SIZE)) is not None
+
+
+def is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def _inflate(cdata):
+    return zlib.decompress(cdata, -15)
+
+
+def scan_blocks(path):
+    """(compressed_offset, uncompressed_offset) of every block, from headers only."""
+    table = []
+    coff = uoff = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(HEADER_SIZE)
+            if not header:
+                break
+            bsize = _parse_header(header)
+            if bsize is None:
+                raise ValueError(f"{path}: not a BGZF block at offset {coff}")
+            f.seek(coff + bsize - 4)
+            isize = struct.unpack("<I", f.read(4))[0]
+            table.append((coff, uoff))
+            coff += bsize
+            uoff += isize
+    return table
+
+
+def read_gzi(path):
+    # samtools .gzi: uint64 count, then (compressed, uncompressed) uint64 pairs
+    # for every block but the first.
+    with open(path, "rb") as f:
+        data = f.read()
+    (n,) = struct.unpack_from("<Q", data, 0)
+    pairs = struct.unpack_from(f"<{2 * n}Q", data, 8)
+    return [(0, 0)] + list(zip(pairs[0::2], pairs[1::2]))
+
+
+def write_gzi(table, path):
+    rest = [v for pair in table[1:] for v in pair]
+    with open(path, "wb") as f:
+        f.write(struct.pack(f"<Q{len(rest)}Q", len(table) - 1, *rest))
+
+
+def load_block_table(path):
+    gzi = path + ".gzi"
+    if os.path.exists(gzi) and os.path.getmtime(gzi) >= os.path.getmtime(path):
+        return read_gzi(gzi)
+    table = scan_blocks(path)
+    try:
+        write_gzi(table, gzi)
+    except OSError:
+        pass
+    return table
+
+
+class BgzfReader(io.RawIOBase):
+    """Seekable reader over a BGZF file; blocks are inflated ahead in a thread pool."""
+
+    def __init__(self, path, threads=None, prefetch=PREFETCH_BLOCKS):
+        super().__init__()
+        self.path = path
+        self.prefetch = prefetch
+        self._f = open(path, "rb")
+        self._pool = ThreadPoolExecutor(threads or os.cpu_count() or 1)
+        self._table = None
+        self._restart(0, 0)
+
+    def _restart(self, coff, uoff):
+        self._f.seek(coff)
+        self._coff = coff
+        self._pending = deque()
+        self._buf = b""
+        self._buf_pos = 0
+        self._block_coff = coff
+        self._pos = uoff
+
+    def _fill(self):
+        # keep `prefetch` blocks in flight so parsing never waits on a single inflate
+        while len(self._pending) < self.prefetch:
+            header = self._f.read(HEADER_SIZE)
+            if not header:
+                break
+            bsize = _parse_header(header)
+            if bsize is None:
+                raise ValueError(f"{self.path}: not a BGZF block at offset {self._coff}")
+            body = self._f.read(bsize - HEADER_SIZE)
+            self._pending.append((self._coff, self._pool.submit(_inflate, body[:-8])))
+            self._coff += bsize
+
+    def _next_block(self):
+        while True:
+            self._fill()
+            if not self._pending:
+                return False
+            coff, fut = self._pending.popleft()
+            data = fut.result()
+            if data:
+                self._block_coff = coff
+                self._buf = data
+                self._buf_pos = 0
+                return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        if self._buf_pos >= len(self._buf) and not self._next_block():
+            return 0
+        n = min(len(b), len(self._buf) - self._buf_pos)
+        b[:n] = self._buf[self._buf_pos:self._buf_pos + n]
+        self._buf_pos += n
+        self._pos += n
+        return n
+
+    def tell(self):
+        return self._pos
+
+    def block_table(self):
+        if self._table is None:
+            self._table = load_block_table(self.path)
+        return self._table
+
+    def offset_to_virtual(self, offset):
+        table = self.block_table()
+        i = bisect_right(table, offset, key=lambda t: t[1]) - 1
+        coff, uoff = table[max(i, 0)]
+        return (coff << 16) | (offset - uoff)
+
+    def virtual_to_offset(self, voffset):
+        table = self.block_table()
+        coff = voffset >> 16
+        i = bisect_right(table, coff, key=lambda t: t[0]) - 1
+        return table[i][1] + (voffset & 0xFFFF)
+
+    def seek_virtual(self, voffset):
+        coff, within = voffset >> 16, voffset & 0xFFFF
+        table = self.block_table()
+        i = bisect_right(table, coff, key=lambda t: t[0]) - 1
+        self._restart(coff, table[i][1])
+        if within:
+            self._skip(within)
+        return self._pos
+
+    def tell_virtual(self):
+        if self._buf_pos < len(self._buf):
+            return (self._block_coff << 16) | self._buf_pos
+        return (self._pending[0][0] if self._pending else self._coff) << 16
+
+    def _skip(self, n):
+        while n:
+            if self._buf_pos >= len(self._buf) and not self._next_block():
+                return
+            step = min(n, len(self._buf) - self._buf_pos)
+            self._buf_pos += step
+            self._pos += step
+            n -= step
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("BGZF supports absolute and relative seeks only")
+        if offset == self._pos:
+            return self._pos
+        return self.seek_virtual(self.offset_to_virtual(offset))
+
+    def close(self):
+        if not self.closed:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._f.close()
+        super().close()
+
+
+def open_bgzf(path, threads=None, buffer_size=1 << 20):
+    return io.BufferedReader(BgzfReader(path, threads), buffer_size)
+
+
+def write_bgzf(data, path, block_size=0xFF00, level=6):
+    """Write `data` as BGZF blocks followed by the empty EOF block."""
+    with open(path, "wb") as f:
+        for i in range(0, len(data), block_size):
+            f.write(_deflate_block(data[i:i + block_size], level))
+        f.write(_deflate_block(b"", level))
+
+
+def _deflate_block(chunk, level):
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = comp.compress(chunk) + comp.flush()
+    bsize = HEADER_SIZE + len(cdata) + 8
+    header = struct.pack("<4BI2BH2BHH", 0x1F, 0x8B, 8, 4, 0, 0, 0xFF, 6, ord("B"), ord("C"), 2, bsize - 1)
+    return header + cdata + struct.pack("<II", zlib.crc32(chunk), len(chunk))
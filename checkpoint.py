@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from debruijn import UnitigGraph
+from fasta_io import ReadFile, file_digest
+from kmer_count import KmerTable
+from packed_seq import PackedSeq, decode, encode, ints_to_kmers, kmers_to_ints
+
+FORMAT_VERSION = 1
+CHECKPOINT_DIR = ".dbg_cache"
+META_FILE = "meta.json"
+
+# A checkpoint is a directory holding meta.json (kind, k, canonical mode,
+# input hash, ...) and one .npy file per array. Checkpointing is opt-in:
+# nothing is written unless a caller passes a directory, such as
+# CHECKPOINT_DIR.
+
+
+def reads_digest(reads):
+    """sha256 of a read source: the file content for a path or ReadFile,
+    otherwise the reads themselves (which must be re-iterable)."""
+    if isinstance(reads, (str, os.PathLike)):
+        return file_digest(reads)
+    if isinstance(reads, ReadFile):
+        return file_digest(reads.path)
+    if iter(reads) is reads:
+        raise TypeError("cannot hash a one-shot iterator of reads; pass input_hash")
+    h = hashlib.sha256()
+    for r in reads:
+        if isinstance(r, PackedSeq):
+            r = str(r)
+        h.update(r.encode("ascii") if isinstance(r, str) else bytes(r))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def checkpoint_path(directory, kind, input_hash, k, canonical, min_count=None):
+    name = f"{input_hash[:16]}_k{k}_{'c' if canonical else 'f'}"
+    if min_count is not None:
+        name += f"_m{min_count}"
+    return os.path.join(directory, f"{name}.{kind}")
+
+
+def save_arrays(path, meta, arrays):
+    """Write a checkpoint directory; it replaces `path` only once complete."""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), arr)
+    with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(dict(meta, format=FORMAT_VERSION, arrays=sorted(arrays)), f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+
+def load_arrays(path, kind, mmap=True, **expected):
+    """(meta, {name: array}) of a checkpoint. ValueError if it is not a `kind`
+    checkpoint or a tag in `expected` (None = any) does not match."""
+    with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION or meta.get("kind") != kind:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} {kind} checkpoint")
+    for key, value in expected.items():
+        if value is not None and meta.get(key) != value:
+            raise ValueError(f"{path}: {key} is {meta.get(key)!r}, expected {value!r}")
+    mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in meta["arrays"]}
+    return meta, arrays
+
+
+def save_kmer_table(path, table, input_hash=None, min_count=1):
+    """min_count: k-mers seen fewer times were already dropped by the counter."""
+    meta = {"kind": "kmers", "k": table.k, "canonical": bool(table.canonical),
+            "input_hash": input_hash, "min_count": min_count}
+    return save_arrays(path, meta, {"keys": table.keys, "counts": table.counts})
+
+
+def load_kmer_table(path, k=None, canonical=None, input_hash=None, min_count=None, mmap=True):
+    """min_count: refuse a table whose counter dropped k-mers that a filter at
+    this count would keep."""
+    meta, arrays = load_arrays(path, "kmers", mmap, k=k, canonical=canonical, input_hash=input_hash)
+    if min_count is not None and meta["min_count"] > min_count:
+        raise ValueError(f"{path} was counted with min_count {meta['min_count']}, need {min_count} or less")
+    return KmerTable(meta["k"], meta["canonical"], arrays["keys"], arrays["counts"])
+
+
+def save_graph(path, graph, input_hash=None, canonical=None, min_count=None):
+    """The unitig sequences are stored 2-bit packed, node ids as packed (k-1)-mers."""
+    k = graph.k
+    meta = {"kind": "graph", "k": k, "canonical": canonical, "input_hash": input_hash,
+            "min_count": min_count, "seq_length": len(graph.seq)}
+    arrays = {
+        "seq": PackedSeq.from_codes(encode(graph.seq)).data,
+        "starts": np.array(graph.starts, dtype=np.int64),
+        "ends": np.array(graph.ends, dtype=np.int64),
+        "src": ints_to_kmers(graph.src, k - 1),
+        "dst": ints_to_kmers(graph.dst, k - 1),
+        "coverage": np.array(graph.coverage, dtype=np.float64),
+    }
+    return save_arrays(path, meta, arrays)
+
+
+def load_graph(path, k=None, canonical=None, input_hash=None, min_count=None):
+    """Graph reload is not memory-mapped: UnitigGraph works on a str and
+    Python int node ids (and indexes them by node in a dict), so the mapped
+    arrays are decoded into those once. Only k-mer tables stay mapped."""
+    meta, a = load_arrays(path, "graph", True, k=k, canonical=canonical, input_hash=input_hash,
+                          min_count=min_count)
+    seq = decode(PackedSeq(a["seq"], 0, meta["seq_length"]).codes())
+    return UnitigGraph(meta["k"], seq, a["starts"].tolist(), a["ends"].tolist(), kmers_to_ints(a["src"]),
+                       kmers_to_ints(a["dst"]), a["coverage"].tolist())
+
+
+def cached_kmer_table(directory, input_hash, k, canonical, count, min_count=1):
+    """The k-mer table checkpointed for these reads, k and strand mode, or
+    count() saved as one. A checkpoint counted with a higher min_count than
+    requested lacks k-mers and is replaced."""
+    path = checkpoint_path(directory, "kmers", input_hash, k, canonical)
+    try:
+        return load_kmer_table(path, k, canonical, input_hash, min_count)
+    except (OSError, ValueError):
+        pass
+    table = count()
+    os.makedirs(directory, exist_ok=True)
+    save_kmer_table(path, table, input_hash, min_count)
+    return table
+
+
+def cached_graph(directory, input_hash, k, canonical, min_count, build):
+    """The compacted graph checkpointed for these reads and parameters, or
+    build() saved as one."""
+    path = checkpoint_path(directory, "graph", input_hash, k, canonical, min_count)
+    try:
+        return load_graph(path, k, canonical, input_hash, min_count)
+    except (OSError, ValueError):
+        pass
+    graph = build()
+    os.makedirs(directory, exist_ok=True)
+    save_graph(path, graph, input_hash, canonical, min_count)
+    return graph
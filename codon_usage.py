@@ -0,0 +1,85 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from codons import AA_NAMES, CODONS, N_CODONS, amino_acid_counts, base_codes, codon_counts, codon_indices
+from fasta_io import file_digest, iter_fasta, resolve_fasta
+
+FASTA_EXTENSIONS = (".fa", ".fasta", ".fna", ".ffn", ".fa.gz", ".fasta.gz", ".fna.gz")
+CACHE_DIR = ".codon_cache"
+
+CodonUsage = namedtuple("CodonUsage", "paths counts aa_counts")
+
+
+def list_genomes(source):
+    """FASTA files of a directory, or the paths listed in a manifest file
+    (one per line, relative to the manifest, '#' starts a comment)."""
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(FASTA_EXTENSIONS))
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                paths.append(resolve_fasta(os.path.join(base, line)))
+    return paths
+
+
+def file_codon_counts(path):
+    """Codon counts of all records of `path` read as one sequence in frame 1,
+    like the concatenated genome of read_sequence, without building it."""
+    counts = np.zeros(N_CODONS, dtype=np.int64)
+    carry = np.empty(0, dtype=np.uint8)
+    for _, seq in iter_fasta(path):
+        codes = np.concatenate([carry, base_codes(seq)])
+        whole = len(codes) - len(codes) % 3
+        counts += codon_counts(codon_indices(codes[:whole]))
+        carry = codes[whole:]
+    return counts
+
+
+def _cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, digest + ".npy")
+
+
+def codon_usage(paths, workers=1, cache_dir=CACHE_DIR):
+    """genomes x 64 codon count matrix (rows in the order of `paths`) plus
+    amino-acid totals. Each file's row is cached under its content hash, so
+    only new or changed files are counted again."""
+    counts = np.zeros((len(paths), N_CODONS), dtype=np.int64)
+    todo = {}
+    digests = {}
+    for i, path in enumerate(paths):
+        digest = file_digest(path)
+        digests[i] = digest
+        cached = _cache_path(cache_dir, digest) if cache_dir else None
+        if cached and os.path.exists(cached):
+            counts[i] = np.load(cached)
+        else:
+            todo[i] = path
+    if todo:
+        if workers <= 1 or len(todo) == 1:
+            rows = [file_codon_counts(path) for path in todo.values()]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(file_codon_counts, todo.values()))
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        for i, row in zip(todo, rows):
+            counts[i] = row
+            if cache_dir:
+                np.save(_cache_path(cache_dir, digests[i]), row)
+    return CodonUsage(list(paths), counts, amino_acid_counts(counts))
+
+
+def write_usage_csv(path, usage):
+    """One row per genome: file, the 64 codon counts, then the amino-acid totals."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(["genome"] + CODONS + AA_NAMES) + "\n")
+        for i, genome in enumerate(usage.paths):
+            values = usage.counts[i].tolist() + [int(usage.aa_counts[aa][i]) for aa in AA_NAMES]
+            f.write(",".join([os.path.basename(genome)] + [str(v) for v in values]) + "\n")
@@ -0,0 +1,179 @@
+import numpy as np
+
+from packed_seq import ENCODE, INVALID
+
+genetic_code = {
+    'UUU': 'Phe', 'UUC': 'Phe',
+    'UUA': 'Leu', 'UUG': 'Leu', 'CUU': 'Leu', 'CUC': 'Leu', 'CUA': 'Leu', 'CUG': 'Leu',
+    'AUU': 'Ile', 'AUC': 'Ile', 'AUA': 'Ile',
+    'AUG': 'Met',
+    'GUU': 'Val', 'GUC': 'Val', 'GUA': 'Val', 'GUG': 'Val',
+    'UCU': 'Ser', 'UCC': 'Ser', 'UCA': 'Ser', 'UCG': 'Ser',
+    'CCU': 'Pro', 'CCC': 'Pro', 'CCA': 'Pro', 'CCG': 'Pro',
+    'ACU': 'Thr', 'ACC': 'Thr', 'ACA': 'Thr', 'ACG': 'Thr',
+    'GCU': 'Ala', 'GCC': 'Ala', 'GCA': 'Ala', 'GCG': 'Ala',
+    'UAU': 'Tyr', 'UAC': 'Tyr',
+    'UAA': 'Stop', 'UAG': 'Stop', 'UGA': 'Stop',
+    'CAU': 'His', 'CAC': 'His',
+    'CAA': 'Gln', 'CAG': 'Gln',
+    'AAU': 'Asn', 'AAC': 'Asn',
+    'AAA': 'Lys', 'AAG': 'Lys',
+    'GAU': 'Asp', 'GAC': 'Asp',
+    'GAA': 'Glu', 'GAG': 'Glu',
+    'UGU': 'Cys', 'UGC': 'Cys',
+    'UGG': 'Trp',
+    'CGU': 'Arg', 'CGC': 'Arg', 'CGA': 'Arg', 'CGG': 'Arg',
+    'AGU': 'Ser', 'AGC': 'Ser',
+    'AGA': 'Arg', 'AGG': 'Arg',
+    'GGU': 'Gly', 'GGC': 'Gly', 'GGA': 'Gly', 'GGG': 'Gly'
+}
+
+ONE_LETTER = {
+    'Ala': 'A', 'Arg': 'R', 'Asn': 'N', 'Asp': 'D', 'Cys': 'C', 'Gln': 'Q', 'Glu': 'E',
+    'Gly': 'G', 'His': 'H', 'Ile': 'I', 'Leu': 'L', 'Lys': 'K', 'Met': 'M', 'Phe': 'F',
+    'Pro': 'P', 'Ser': 'S', 'Thr': 'T', 'Trp': 'W', 'Tyr': 'Y', 'Val': 'V', 'Stop': '*',
+}
+
+# Codon index = 16 * first + 4 * second + third base code (A0 C1 G2 T/U3);
+# a codon with any other symbol gets NO_CODON.
+N_CODONS = 64
+NO_CODON = 64
+CODONS = ["".join("ACGU"[(c >> s) & 3] for s in (4, 2, 0)) for c in range(N_CODONS)]
+AMINO_ACIDS = [genetic_code[c] for c in CODONS]
+STOP_CODONS = np.array([i for i, aa in enumerate(AMINO_ACIDS) if aa == 'Stop'])
+START_CODON = CODONS.index('AUG')
+
+# one byte per codon index, 'X' for NO_CODON
+AA_TABLE = np.frombuffer("".join(ONE_LETTER[aa] for aa in AMINO_ACIDS).encode("ascii") + b"X", dtype=np.uint8)
+AA_NAMES = sorted(set(AMINO_ACIDS) - {'Stop'})
+AA_CODONS = {aa: [i for i, a in enumerate(AMINO_ACIDS) if a == aa] for aa in AA_NAMES}
+IS_STOP = np.zeros(N_CODONS + 1, dtype=bool)
+IS_STOP[STOP_CODONS] = True
+
+BASE_CODES = ENCODE.copy()
+BASE_CODES[ord('U')] = BASE_CODES[ord('u')] = 3
+
+# frames 1..3 read the forward strand from offset 0..2, -1..-3 the reverse complement
+FRAMES = (1, 2, 3, -1, -2, -3)
+
+ORF_DTYPE = np.dtype([("frame", "i1"), ("start", "i8"), ("end", "i8"), ("length", "i8")])
+
+
+def base_codes(seq):
+    """DNA or RNA (any case) -> 0..3 per base, anything else -> INVALID."""
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+    return BASE_CODES[np.frombuffer(bytes(seq), dtype=np.uint8)]
+
+
+def revcomp_codes(codes):
+    rc = (3 - codes)[::-1]
+    rc[codes[::-1] == INVALID] = INVALID
+    return rc
+
+
+def codon_indices(codes, offset=0):
+    """Codon index of every whole codon read from `offset`."""
+    n = (len(codes) - offset) // 3
+    if n <= 0:
+        return np.empty(0, dtype=np.uint8)
+    c = codes[offset:offset + 3 * n].reshape(n, 3)
+    idx = (c[:, 0] << 4) | (c[:, 1] << 2) | c[:, 2]
+    idx[(c == INVALID).any(axis=1)] = NO_CODON
+    return idx
+
+
+def frame_codons(codes, frame, rc=None):
+    """Codon indices of one of FRAMES; pass `rc` to reuse a reverse complement."""
+    if frame < 0:
+        return codon_indices(revcomp_codes(codes) if rc is None else rc, -frame - 1)
+    return codon_indices(codes, frame - 1)
+
+
+def translate_codons(idx):
+    """One-letter protein (bytes) of codon indices, stops as '*'."""
+    return AA_TABLE[idx].tobytes()
+
+
+def translate_frames(seq):
+    """{frame: protein bytes} for all six frames, one table lookup each."""
+    codes = base_codes(seq)
+    rc = revcomp_codes(codes)
+    return {f: translate_codons(frame_codons(codes, f, rc)) for f in FRAMES}
+
+
+def codon_counts(idx):
+    """int64[64] count of every codon index; NO_CODON is dropped."""
+    return np.bincount(idx, minlength=N_CODONS + 1)[:N_CODONS]
+
+
+def amino_acid_counts(counts):
+    """{amino acid: count} of codon count vector(s), Stop left out; the values
+    are arrays when `counts` is a genomes x 64 matrix."""
+    counts = np.asarray(counts)
+    return {aa: counts[..., AA_CODONS[aa]].sum(axis=-1) for aa in AA_NAMES}
+
+
+def frame_orfs(idx, min_length=0):
+    """(start, stop) codon positions of the ORFs in one frame: each stop codon
+    paired with the first AUG after the previous stop; stop is exclusive."""
+    stops = np.flatnonzero(IS_STOP[idx])
+    starts = np.flatnonzero(idx == START_CODON)
+    if not len(stops) or not len(starts):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # index of the stop closing each start; the first start per stop wins
+    closing = np.searchsorted(stops, starts)
+    keep = closing < len(stops)
+    starts, closing = starts[keep], closing[keep]
+    closing, first = np.unique(closing, return_index=True)
+    starts = starts[first]
+    ends = stops[closing]
+    long_enough = ends - starts >= min_length
+    return starts[long_enough], ends[long_enough]
+
+
+def find_orfs(seq, min_length=100):
+    """ORF_DTYPE array of every AUG..stop ORF of at least `min_length` amino
+    acids in the six frames. start/end are 0-based, end-exclusive positions on
+    the forward strand and include the stop codon; length is in amino acids."""
+    codes = base_codes(seq)
+    rc = revcomp_codes(codes)
+    n = len(codes)
+    parts = []
+    for f in FRAMES:
+        offset = abs(f) - 1
+        s, e = frame_orfs(frame_codons(codes, f, rc), min_length)
+        rec = np.empty(len(s), dtype=ORF_DTYPE)
+        rec["frame"] = f
+        rec["length"] = e - s
+        lo = offset + 3 * s
+        hi = offset + 3 * (e + 1)
+        if f < 0:
+            lo, hi = n - hi, n - lo
+        rec["start"] = lo
+        rec["end"] = hi
+        parts.append(rec)
+    orfs = np.concatenate(parts)
+    return orfs[np.argsort(orfs["start"], kind="stable")]
+
+
+def orf_proteins(seq, orfs):
+    """Protein (str, without the stop) of every ORF of find_orfs(seq)."""
+    codes = base_codes(seq)
+    rc = revcomp_codes(codes)
+    n = len(codes)
+    out = []
+    for frame, start, end, length in orfs.tolist():
+        if frame < 0:
+            start = n - end
+        c = rc if frame < 0 else codes
+        out.append(translate_codons(codon_indices(c[start:start + 3 * length])).decode("ascii"))
+    return out
+
+
+def write_protein_fasta(f, orfs, proteins, name="seq", line_width=60):
+    """Write one record per ORF to the text file `f`:
+    >name_orfN frame=F start=S end=E length=L (1-based, inclusive)."""
+    for i, ((frame, start, end, length), prot) in enumerate(zip(orfs.tolist(), proteins), 1):
+        f.write(f">{name}_orf{i} frame={frame:+d} start={start + 1} end={end} length={length}\n")
+        f.write("".join(prot[j:j + line_width] + "\n" for j in range(0, len(prot), line_width)))
@@ -0,0 +1,264 @@
+from collections import Counter, namedtuple
+
+from packed_seq import BASES, decode_kmer
+
+BUBBLE_RATIO = 0.5
+MAX_ROUNDS = 8
+
+SimplifyStats = namedtuple("SimplifyStats", "tips bubbles nodes_removed edges_removed rounds")
+
+
+class UnitigGraph:
+    """Compacted de Bruijn graph: every maximal non-branching path is one
+    unitig edge between two branching nodes. Unitig sequences live in one
+    shared string and are addressed by (start, end) offsets. coverage, when
+    known, is the mean k-mer count of every unitig."""
+
+    def __init__(self, k, seq, starts, ends, src, dst, coverage=None):
+        self.k = k
+        self.seq = seq
+        self.starts = starts
+        self.ends = ends
+        self.src = src
+        self.dst = dst
+        self.coverage = coverage if coverage is not None else [1.0] * len(src)
+        self.out = {}
+        for uid, u in enumerate(src):
+            self.out.setdefault(u, []).append(uid)
+
+    def __len__(self):
+        return len(self.src)
+
+    def unitig(self, uid):
+        return self.seq[self.starts[uid]:self.ends[uid]]
+
+    def n_kmers(self, uid):
+        return self.ends[uid] - self.starts[uid] - self.k + 1
+
+    def size(self):
+        """(nodes, edges) of the uncompacted graph: every k-mer is an edge,
+        every inner (k-1)-mer of a unitig and every end node is a node."""
+        edges = sum(e - s for s, e in zip(self.starts, self.ends)) - len(self.src) * (self.k - 1)
+        return edges - len(self.src) + len(set(self.src) | set(self.dst)), edges
+
+    def degrees(self):
+        indeg = Counter()
+        outdeg = Counter()
+        for u, v in zip(self.src, self.dst):
+            outdeg[u] += 1
+            indeg[v] += 1
+            _ = indeg[u]
+            _ = outdeg[v]
+        return indeg, outdeg
+
+    def path_to_seq(self, uids):
+        """Spell a walk of unitigs; consecutive unitigs share a (k-1)-mer node."""
+        if not uids:
+            return ""
+        skip = self.k - 1
+        s, e = self.starts, self.ends
+        seq = self.seq
+        return "".join([seq[s[uids[0]]:e[uids[0]]]] + [seq[s[u] + skip:e[u]] for u in uids[1:]])
+
+
+def compact_graph(edges, indeg, outdeg, k, counts=None):
+    """Collapse the (k-1)-mer node graph from build_dbg into unitigs.
+    counts[u][i], if given, is the k-mer count of edge u -> edges[u][i]."""
+    pieces = []
+    starts = []
+    ends = []
+    src = []
+    dst = []
+    coverage = []
+    pos = 0
+
+    def emit(first, tail, total):
+        nonlocal pos
+        head = decode_kmer(first, k - 1)
+        body = "".join([BASES[n & 3] for n in tail])
+        pieces.append(head)
+        pieces.append(body)
+        starts.append(pos)
+        pos += len(head) + len(body)
+        ends.append(pos)
+        src.append(first)
+        dst.append(tail[-1])
+        coverage.append(total / len(tail))
+
+    def count(u, i):
+        return counts[u][i] if counts is not None else 1
+
+    # successor of every 1-in/1-out node; entries are consumed as walks pass them
+    succ = {u: (vs[0], count(u, 0)) for u, vs in edges.items() if len(vs) == 1 and indeg[u] == 1}
+    for u, vs in edges.items():
+        if outdeg[u] == 1 and indeg[u] == 1:
+            continue
+        for i, v in enumerate(vs):
+            tail = [v]
+            total = count(u, i)
+            while v in succ:
+                v, c = succ.pop(v)
+                tail.append(v)
+                total += c
+            emit(u, tail, total)
+
+    # whatever is left consists of isolated cycles of 1-in/1-out nodes
+    while succ:
+        u, (v, total) = succ.popitem()
+        tail = [v]
+        while v != u:
+            v, c = succ.pop(v)
+            tail.append(v)
+            total += c
+        emit(u, tail, total)
+
+    return UnitigGraph(k, "".join(pieces), starts, ends, src, dst, coverage)
+
+
+def _relink(graph, keep):
+    """UnitigGraph of the unitigs in `keep`, with chains through nodes that
+    are left with one unitig in and one out merged into single unitigs."""
+    indeg = Counter(graph.dst[u] for u in keep)
+    outdeg = Counter(graph.src[u] for u in keep)
+    # interior nodes are fixed up front; succ entries are consumed as walks pass them
+    succ = {}
+    for uid in keep:
+        u = graph.src[uid]
+        if indeg[u] == 1 and outdeg[u] == 1:
+            succ[u] = uid
+    interior = set(succ)
+    pieces = []
+    starts = []
+    ends = []
+    src = []
+    dst = []
+    coverage = []
+    pos = 0
+
+    def emit(path):
+        nonlocal pos
+        seq = graph.path_to_seq(path)
+        pieces.append(seq)
+        starts.append(pos)
+        pos += len(seq)
+        ends.append(pos)
+        src.append(graph.src[path[0]])
+        dst.append(graph.dst[path[-1]])
+        lengths = [graph.n_kmers(u) for u in path]
+        coverage.append(sum(graph.coverage[u] * n for u, n in zip(path, lengths)) / sum(lengths))
+
+    for uid in keep:
+        if graph.src[uid] in interior:
+            continue
+        path = [uid]
+        v = graph.dst[uid]
+        while v in succ:
+            nxt = succ.pop(v)
+            path.append(nxt)
+            v = graph.dst[nxt]
+        emit(path)
+
+    # isolated cycles
+    while succ:
+        u, uid = succ.popitem()
+        path = [uid]
+        v = graph.dst[uid]
+        while v != u:
+            nxt = succ.pop(v)
+            path.append(nxt)
+            v = graph.dst[nxt]
+        emit(path)
+
+    return UnitigGraph(graph.k, "".join(pieces), starts, ends, src, dst, coverage)
+
+
+def find_tips(graph, tip_length):
+    """Unitigs shorter than tip_length k-mers that dead-end on one side and
+    join a branching node on the other. At a node where every branch is a tip
+    the best one (coverage, then length) is kept."""
+    indeg, outdeg = graph.degrees()
+    by_junction = {}
+    for uid, (u, v) in enumerate(zip(graph.src, graph.dst)):
+        if u == v or graph.n_kmers(uid) >= tip_length:
+            continue
+        if indeg[u] == 0 and outdeg[u] == 1 and indeg[v] > 1:
+            by_junction.setdefault((v, "in"), []).append(uid)
+        elif outdeg[v] == 0 and indeg[v] == 1 and outdeg[u] > 1:
+            by_junction.setdefault((u, "out"), []).append(uid)
+    tips = []
+    for (node, side), uids in by_junction.items():
+        if len(uids) == (indeg[node] if side == "in" else outdeg[node]):
+            uids.remove(max(uids, key=lambda x: (graph.coverage[x], graph.n_kmers(x))))
+        tips.extend(uids)
+    return tips
+
+
+def find_bubbles(graph, max_length, ratio=BUBBLE_RATIO):
+    """Parallel unitigs (same start and end node, at most max_length k-mers)
+    whose coverage is below ratio times that of the best branch."""
+    groups = {}
+    for uid, (u, v) in enumerate(zip(graph.src, graph.dst)):
+        if u != v and graph.n_kmers(uid) <= max_length:
+            groups.setdefault((u, v), []).append(uid)
+    popped = []
+    for uids in groups.values():
+        if len(uids) < 2:
+            continue
+        best = max(uids, key=lambda x: (graph.coverage[x], graph.n_kmers(x)))
+        popped.extend(x for x in uids if x != best and graph.coverage[x] < ratio * graph.coverage[best])
+    return popped
+
+
+def simplify_graph(graph, tip_length=None, bubble_length=None, bubble_ratio=BUBBLE_RATIO, max_rounds=MAX_ROUNDS):
+    """Clip tips and pop bubbles (both default to 2k k-mers), re-compacting
+    after each round; every round is linear in the number of unitigs.
+    Returns the simplified graph and a SimplifyStats."""
+    k = graph.k
+    tip_length = 2 * k if tip_length is None else tip_length
+    bubble_length = 2 * k if bubble_length is None else bubble_length
+    nodes0, edges0 = graph.size()
+    tips = bubbles = rounds = 0
+    while rounds < max_rounds:
+        cut = set(find_tips(graph, tip_length))
+        popped = set(find_bubbles(graph, bubble_length, bubble_ratio)) - cut
+        if not cut and not popped:
+            break
+        tips += len(cut)
+        bubbles += len(popped)
+        rounds += 1
+        edges = graph.size()[1]
+        graph = _relink(graph, [u for u in range(len(graph)) if u not in cut and u not in popped])
+        if graph.size()[1] > edges:
+            raise RuntimeError("graph simplification added k-mers")
+    nodes, edges = graph.size()
+    return graph, SimplifyStats(tips, bubbles, nodes0 - nodes, edges0 - edges, rounds)
+
+
+def euler_unitig_paths(graph):
+    """euler_paths from ex1.py, run over unitig edges instead of single k-mers."""
+    indeg, outdeg = graph.degrees()
+    E = {u: list(ids) for u, ids in graph.out.items()}
+    nodes = set(indeg) | set(outdeg)
+    starts = [n for n in nodes if outdeg[n] - indeg[n] == 1]
+    if not starts:
+        starts = [n for n, d in outdeg.items() if d > 0]
+    dst = graph.dst
+    paths = []
+    for s in starts:
+        if not E.get(s):
+            continue
+        st = [(s, None)]
+        circuit = []
+        while st:
+            v, uid = st[-1]
+            if E.get(v):
+                nxt = E[v].pop()
+                st.append((dst[nxt], nxt))
+            else:
+                st.pop()
+                if uid is not None:
+                    circuit.append(uid)
+        circuit.reverse()
+        if circuit:
+            paths.append(circuit)
+    return paths
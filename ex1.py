@@ -1,65 +1,95 @@
-import random
 from collections import defaultdict, Counter
+import os
+from fasta_io import ReadFile, read_dna, resolve_fasta
+from checkpoint import cached_graph, cached_kmer_table, reads_digest
+from debruijn import BUBBLE_RATIO, compact_graph, euler_unitig_paths, simplify_graph
+from kmer_count import count_kmers
+from kmer_partition import count_kmers_on_disk
+from kmer_sketch import sketch_kmers
+from packed_seq import BASES, decode_kmer, kmer_prefix, kmer_suffix, kmers_to_ints
+from read_sim import ReadSimulator
 
 SEQ_PATH = "sequence.fasta"
+READS_PATH = "reads.fasta"
 READS_N = 2000
 READ_MIN = 100
 READ_MAX = 150
 K = 61
 MIN_KMER_COUNT = 2
 SEED = 42
+SUB_RATE = 0.0  # per-base read error rates of the simulator
+INS_RATE = 0.0
+DEL_RATE = 0.0
+COMPACT = None  # traverse unitigs; None: only on the stranded (canonical=False) graph
+SIMPLIFY = True  # needs the compacted graph
+TIP_LENGTH = 2 * K  # in k-mers
+BUBBLE_LENGTH = 2 * K
+SKETCH_FPR = None  # e.g. 0.01: pre-filter singleton k-mers with a count-min sketch
+SKETCH_MEMORY = None  # sketch size in bytes; overrides SKETCH_FPR sizing
+CHECKPOINT_DIR = None  # e.g. checkpoint.CHECKPOINT_DIR: keep the k-mer table and graph for later runs
 
-def read_fasta_single(path):
-    s = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.startswith(">"):
-                s.append(line.strip())
-    s = "".join(s).upper()
-    s = "".join(c for c in s if c in "ACGT")
-    return s
+COMPLEMENT = str.maketrans("ACGT", "TGCA")
 
 def revcomp(s):
-    return s.translate(str.maketrans("ACGT", "TGCA"))[::-1]
-
-def canonical_kmer(km):
-    rc = revcomp(km)
-    return km if km <= rc else rc
-
-def sample_reads(genome, n, min_len, max_len):
-    random.seed(SEED)
-    L = len(genome)
-    reads = []
-    for _ in range(n):
-        rlen = random.randint(min_len, max_len)
-        i = random.randint(0, L - rlen)
-        r = genome[i:i + rlen]
-        if random.random() < 0.5:
-            r = revcomp(r)
-        reads.append(r)
+    return s.translate(COMPLEMENT)[::-1]
+
+def read_simulator(genome, min_len=READ_MIN, max_len=READ_MAX, seed=SEED):
+    return ReadSimulator(genome, min_len, max_len, both_strands=True,
+                         sub_rate=SUB_RATE, ins_rate=INS_RATE, del_rate=DEL_RATE, seed=seed)
+
+def sample_reads(genome, n, min_len, max_len, seed=SEED):
+    return list(read_simulator(genome, min_len, max_len, seed).reads(n))
+
+def read_source(reads):
+    # a FASTA/FASTQ path is streamed again on every pass instead of loaded
+    if isinstance(reads, (str, os.PathLike)):
+        return ReadFile(resolve_fasta(os.fspath(reads)))
     return reads
 
-def build_dbg(reads, k=K, canonical=True, min_kmer_count=MIN_KMER_COUNT):
-    kc = Counter()
-    for r in reads:
-        if len(r) < k:
-            continue
-        for i in range(len(r) - k + 1):
-            km = r[i:i + k]
-            if canonical:
-                km = canonical_kmer(km)
-            kc[km] += 1
-    keep = {km for km, c in kc.items() if c >= min_kmer_count}
+def count_table(reads, k=K, canonical=True, min_kmer_count=MIN_KMER_COUNT, memory_budget=None, prefilter=None,
+                checkpoint_dir=None, input_hash=None):
+    # With a memory_budget (bytes) k-mers are counted out of core, bucket by bucket.
+    # A prefilter sketch keeps k-mers it saw fewer than min_kmer_count times
+    # out of the exact count.
+    # With a checkpoint_dir the table is saved there, tagged with k, strand
+    # mode and the hash of the reads, and memory-mapped back on later runs.
+    reads = read_source(reads)
+
+    def count():
+        if memory_budget:
+            return count_kmers_on_disk(reads, k, canonical, memory_budget, min_count=min_kmer_count,
+                                       prefilter=prefilter)
+        return count_kmers(reads, k, canonical, prefilter=prefilter, prefilter_min=min_kmer_count)
+
+    if not checkpoint_dir:
+        return count()
+    # an unfiltered table serves any later MIN_KMER_COUNT
+    dropped = min_kmer_count if memory_budget or prefilter else 1
+    return cached_kmer_table(checkpoint_dir, input_hash or reads_digest(reads), k, canonical, count, dropped)
+
+def build_dbg(reads, k=K, canonical=True, min_kmer_count=MIN_KMER_COUNT, memory_budget=None, prefilter=None,
+              with_counts=False, checkpoint_dir=None, input_hash=None):
+    # Nodes are packed (k-1)-mer ints. reads is any iterable of str, bytes or
+    # PackedSeq (a generator works: k-mers are counted batch by batch as reads
+    # arrive), or the path of a FASTA/FASTQ file.
+    # with_counts also returns counts[u][i], the count of k-mer u -> edges[u][i].
+    table = count_table(reads, k, canonical, min_kmer_count, memory_budget, prefilter, checkpoint_dir, input_hash)
+    keep = table.counts >= min_kmer_count
+    solid = table.keys[keep]
     edges = defaultdict(list)
+    counts = defaultdict(list)
     indeg = Counter()
     outdeg = Counter()
-    for km in keep:
-        u, v = km[:-1], km[1:]
+    for u, v, c in zip(kmers_to_ints(kmer_prefix(solid, k)), kmers_to_ints(kmer_suffix(solid, k)),
+                       table.counts[keep].tolist()):
         edges[u].append(v)
+        counts[u].append(c)
         outdeg[u] += 1
         indeg[v] += 1
         _ = indeg[u]
         _ = outdeg[v]
+    if with_counts:
+        return edges, indeg, outdeg, counts
     return edges, indeg, outdeg
 
 def euler_paths(edges, indeg, outdeg):
@@ -85,34 +115,69 @@ def euler_paths(edges, indeg, outdeg):
             paths.append(circuit)
     return paths
 
-def path_to_seq(nodes):
+def path_to_seq(nodes, k=K):
     if not nodes:
         return ""
-    seq = nodes[0]
-    for n in nodes[1:]:
-        seq += n[-1]
-    return seq
-
-def assemble_contigs(reads, k=K, canonical=True, min_kmer_count=MIN_KMER_COUNT):
-    edges, indeg, outdeg = build_dbg(reads, k, canonical, min_kmer_count)
-    paths = euler_paths(edges, indeg, outdeg)
-    contigs = [path_to_seq(p) for p in paths]
+    return decode_kmer(nodes[0], k - 1) + "".join(BASES[n & 3] for n in nodes[1:])
+
+def assemble_contigs(reads, k=K, canonical=True, min_kmer_count=MIN_KMER_COUNT, memory_budget=None, prefilter=None,
+                     simplify=SIMPLIFY, report=None, checkpoint_dir=None, compact=COMPACT):
+    # compact: walk unitigs instead of single (k-1)-mer nodes. The canonical
+    # graph is already split at every strand switch, so there compaction
+    # costs more than it saves (bench_unitigs.py) and is off by default.
+    # simplify: clip tips and pop bubbles on the compacted graph before the
+    # traversal; report(stats) receives the debruijn.SimplifyStats.
+    # checkpoint_dir: reuse (or save) the k-mer table and the compacted graph,
+    # so only the cleaning and the traversal run again
+    reads = read_source(reads)
+    if compact is None:
+        compact = not canonical
+    input_hash = reads_digest(reads) if checkpoint_dir else None
+
+    if not compact:
+        edges, indeg, outdeg = build_dbg(reads, k, canonical, min_kmer_count, memory_budget, prefilter,
+                                         checkpoint_dir=checkpoint_dir, input_hash=input_hash)
+        contigs = [path_to_seq(p, k) for p in euler_paths(edges, indeg, outdeg)]
+        contigs.sort(key=len, reverse=True)
+        return contigs
+
+    def build():
+        edges, indeg, outdeg, counts = build_dbg(reads, k, canonical, min_kmer_count, memory_budget, prefilter,
+                                                 True, checkpoint_dir, input_hash)
+        return compact_graph(edges, indeg, outdeg, k, counts)
+
+    if checkpoint_dir:
+        graph = cached_graph(checkpoint_dir, input_hash, k, canonical, min_kmer_count, build)
+    else:
+        graph = build()
+    if simplify:
+        graph, stats = simplify_graph(graph, TIP_LENGTH, BUBBLE_LENGTH, BUBBLE_RATIO)
+        if report:
+            report(stats)
+    contigs = [graph.path_to_seq(p) for p in euler_unitig_paths(graph)]
     contigs.sort(key=len, reverse=True)
     return contigs
 
+def print_simplify(stats):
+    print(f"Simplified graph: {stats.tips} tips clipped, {stats.bubbles} bubbles popped, "
+          f"{stats.nodes_removed} nodes and {stats.edges_removed} edges removed in {stats.rounds} rounds")
+
 def write_fasta(seqs, path, prefix):
     with open(path, "w") as f:
         for i, s in enumerate(seqs, 1):
-            f.write(f">{prefix}_{i}\n")
-            for j in range(0, len(s), 80):
-                f.write(s[j:j + 80] + "\n")
+            f.write(f">{prefix}_{i}\n" + "".join(s[j:j + 80] + "\n" for j in range(0, len(s), 80)))
 
 def main():
-    genome = read_fasta_single(SEQ_PATH)
+    genome = read_dna(resolve_fasta(SEQ_PATH))
     print("Sequence length:", len(genome))
-    reads = sample_reads(genome, READS_N, READ_MIN, READ_MAX)
-    write_fasta(reads, "reads.fasta", "read")
-    contigs = assemble_contigs(reads, K, True, MIN_KMER_COUNT)
+    read_simulator(genome).write(READS_PATH, READS_N)
+    reads = read_source(READS_PATH)
+    prefilter = None
+    if SKETCH_FPR or SKETCH_MEMORY:
+        prefilter = sketch_kmers(reads, K, True, SKETCH_FPR or 0.01, SKETCH_MEMORY)
+        print(prefilter.report(MIN_KMER_COUNT))
+    contigs = assemble_contigs(reads, K, True, MIN_KMER_COUNT, prefilter=prefilter, report=print_simplify,
+                               checkpoint_dir=CHECKPOINT_DIR)
     if not contigs:
         print("No contigs assembled. Try a smaller K or lower MIN_KMER_COUNT.")
     else:
@@ -0,0 +1,341 @@
+import gzip
+import hashlib
+import os
+from collections import namedtuple
+
+import bgzf
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = b" \t\r\n\v\f"
+ACGT = b"ACGT"
+
+
+def open_binary(path):
+    # BGZF is inflated block-parallel and stays seekable; plain gzip streams through
+    if bgzf.is_bgzf(path):
+        return bgzf.open_bgzf(path)
+    if bgzf.is_gzip(path):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def resolve_fasta(path):
+    """`path`, or its `.gz` sibling when only the compressed copy exists."""
+    if not os.path.exists(path) and os.path.exists(path + ".gz"):
+        return path + ".gz"
+    return path
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """sha256 hex digest of the raw bytes of `path`."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _deletion_table(keep):
+    keep = set(keep)
+    return bytes(b for b in range(256) if b not in keep)
+
+
+def iter_fasta(path, chunk_size=CHUNK_SIZE):
+    """Yield (header, bytearray) per record, reading the file in fixed-size chunks."""
+    header = None
+    seq = bytearray()
+    pending = b""
+    with open_binary(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                buf = pending + chunk
+                cut = buf.rfind(b"\n") + 1
+                if cut == 0:
+                    if buf[:1] != b">":
+                        # a sequence line longer than a chunk goes straight into seq;
+                        # only header lines are kept whole
+                        seq += buf.translate(None, WHITESPACE)
+                        buf = b""
+                    pending = buf
+                    continue
+                pending = buf[cut:]
+                buf = buf[:cut]
+            elif pending:
+                buf = pending + b"\n"
+                pending = b""
+            else:
+                break
+            # buf always starts at a line start and ends with a newline
+            pos = 0
+            n = len(buf)
+            while pos < n:
+                if buf[pos] == 62:  # ">"
+                    eol = buf.index(b"\n", pos)
+                    if header is not None or seq:
+                        yield header or "", seq
+                    header = buf[pos + 1:eol].strip().decode("utf-8", "replace")
+                    seq = bytearray()
+                    pos = eol + 1
+                    continue
+                nxt = buf.find(b"\n>", pos)
+                end = n if nxt < 0 else nxt + 1
+                seq += buf[pos:end].translate(None, WHITESPACE)
+                pos = end
+    if header is not None or seq:
+        yield header or "", seq
+
+
+def read_fasta(path, chunk_size=CHUNK_SIZE):
+    return list(iter_fasta(path, chunk_size))
+
+
+def iter_fastq(path):
+    """Yield (name, bytes) per four-line FASTQ record; qualities are skipped."""
+    with open_binary(path) as f:
+        for header in f:
+            if not header.strip():
+                continue
+            if not header.startswith(b"@"):
+                raise ValueError(f"{path}: expected a FASTQ header, got {header[:40]!r}")
+            seq = f.readline().rstrip()
+            f.readline()
+            f.readline()
+            yield header[1:].strip().decode("utf-8", "replace"), seq
+
+
+def is_fastq(path):
+    with open_binary(path) as f:
+        return f.read(4096).lstrip()[:1] == b"@"
+
+
+def iter_reads(path, chunk_size=CHUNK_SIZE):
+    """Yield the sequence of every record of a FASTA or FASTQ file (plain or gzip)."""
+    records = iter_fastq(path) if is_fastq(path) else iter_fasta(path, chunk_size)
+    for _, seq in records:
+        yield seq
+
+
+class ReadFile:
+    """Re-iterable reads of a FASTA/FASTQ file: every pass streams the file
+    again, so multi-pass consumers never hold the reads in memory."""
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return iter_reads(self.path, self.chunk_size)
+
+
+def clean_sequence(seq, keep=None, upper=True):
+    """Upper-case `seq` in place and drop every byte not in `keep` (if given)."""
+    if not isinstance(seq, bytearray):
+        seq = bytearray(seq)
+    if upper:
+        seq[:] = seq.upper()
+    if keep is not None:
+        seq[:] = seq.translate(None, _deletion_table(keep))
+    return seq
+
+
+def read_sequence(path, keep=None, upper=True, chunk_size=CHUNK_SIZE):
+    """All records of `path` concatenated into one bytearray (headers dropped)."""
+    out = None
+    for _, seq in iter_fasta(path, chunk_size):
+        seq = clean_sequence(seq, keep, upper)
+        if out is None:
+            out = seq
+        else:
+            out += seq
+    return out if out is not None else bytearray()
+
+
+def read_dna(path, chunk_size=CHUNK_SIZE):
+    """ACGT-only, upper-case genome as str, the form the assembly labs work on."""
+    return read_sequence(path, keep=ACGT, chunk_size=chunk_size).decode("ascii")
+
+
+# One line per record with samtools .fai columns, except that the name is the
+# whole header line and records whose lines are not all the same width are
+# stored with linebases=0 and linewidth=<raw byte span>. So the index is
+# cached under its own extension and header line, never as a `.fai`.
+INDEX_SUFFIX = ".fidx"
+INDEX_HEADER = "#fasta_io index 1"
+
+FaiEntry = namedtuple("FaiEntry", ["name", "length", "offset", "linebases", "linewidth"])
+
+
+def _finish_entry(cur, irregular, raw_end):
+    name, length, offset, linebases, linewidth = cur
+    if irregular:
+        return FaiEntry(name, length, offset, 0, raw_end - offset)
+    return FaiEntry(name, length, offset, linebases, linewidth)
+
+
+def iter_fai(path, on_block=None, block_size=CHUNK_SIZE):
+    """Yield the FaiEntry of every record as soon as its last line is read.
+
+    If given, on_block(offset, data) receives the raw sequence lines of the
+    current record in blocks of about block_size bytes (always flushed
+    before the record's entry is yielded); offset is the number of bytes
+    read so far."""
+    cur = None
+    irregular = short_seen = False
+    offset = last_end = 0
+    block = []
+    block_len = 0
+    with open_binary(path) as f:
+        for line in f:
+            n = len(line)
+            if line.startswith(b">"):
+                if cur is not None:
+                    if block:
+                        on_block(offset, b"".join(block))
+                        block = []
+                        block_len = 0
+                    yield _finish_entry(cur, irregular, last_end)
+                name = line[1:].strip().decode("utf-8", "replace").replace("\t", " ")
+                cur = [name, 0, offset + n, 0, 0]
+                irregular = short_seen = False
+                last_end = offset + n
+            elif cur is not None:
+                bases = len(line.rstrip())
+                if bases:
+                    if cur[3] == 0:
+                        cur[3], cur[4] = bases, n
+                    elif short_seen or bases > cur[3]:
+                        irregular = True
+                    if bases != cur[3] or n != cur[4]:
+                        short_seen = True
+                    cur[1] += bases
+                    last_end = offset + bases
+                    if on_block is not None:
+                        block.append(line)
+                        block_len += n
+                        if block_len >= block_size:
+                            on_block(offset + n, b"".join(block))
+                            block = []
+                            block_len = 0
+                else:
+                    short_seen = True
+            offset += n
+    if cur is not None:
+        if block:
+            on_block(offset, b"".join(block))
+        yield _finish_entry(cur, irregular, last_end)
+
+
+def build_fai(path):
+    return list(iter_fai(path))
+
+
+class FastaIndex:
+    """Offset index over a multi-FASTA, cached next to it as `<path>.fidx`."""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+        self._by_name = {e.name: i for i, e in enumerate(entries)}
+
+    @classmethod
+    def cached(cls, path):
+        """The index stored next to `path` if it is newer than the FASTA, else None."""
+        index = path + INDEX_SUFFIX
+        try:
+            if os.path.getmtime(index) >= os.path.getmtime(path):
+                return cls(path, read_index(index))
+        except (OSError, ValueError):
+            pass
+        return None
+
+    @classmethod
+    def load(cls, path, rebuild=False):
+        index = None if rebuild else cls.cached(path)
+        if index is not None:
+            return index
+        entries = build_fai(path)
+        try:
+            write_index(entries, path + INDEX_SUFFIX)
+        except OSError:
+            pass
+        return cls(path, entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._by_name[key]
+        return self.entries[key]
+
+    def names(self):
+        return [e.name for e in self.entries]
+
+    def _raw_pos(self, e, i):
+        if e.linebases == 0:
+            return e.offset + i
+        q, r = divmod(i, e.linebases)
+        return e.offset + q * e.linewidth + r
+
+    def _raw_span(self, e, start, end):
+        if e.linebases == 0:
+            return e.offset, e.offset + e.linewidth
+        if end <= start:
+            return e.offset, e.offset
+        return self._raw_pos(e, start), self._raw_pos(e, end - 1) + 1
+
+    def iter_raw(self, key, chunk_size=CHUNK_SIZE):
+        """Raw bytes of one record (line breaks included), read in chunks."""
+        e = self[key]
+        lo, hi = self._raw_span(e, 0, e.length)
+        with open_binary(self.path) as f:
+            f.seek(lo)
+            while lo < hi:
+                chunk = f.read(min(chunk_size, hi - lo))
+                if not chunk:
+                    break
+                lo += len(chunk)
+                yield chunk
+
+    def fetch(self, key, start=0, end=None):
+        """Bases [start, end) of one record as bytes."""
+        e = self[key]
+        end = e.length if end is None else min(end, e.length)
+        start = max(0, start)
+        if end <= start:
+            return b""
+        lo, hi = self._raw_span(e, start, end)
+        with open_binary(self.path) as f:
+            f.seek(lo)
+            raw = f.read(hi - lo)
+        seq = raw.translate(None, WHITESPACE)
+        if e.linebases == 0:
+            seq = seq[start:end]
+        return seq
+
+
+def read_index(path):
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        if f.readline().rstrip("\n") != INDEX_HEADER:
+            raise ValueError(f"{path} is not a fasta_io index")
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 5:
+                continue
+            entries.append(FaiEntry(cols[0], *(int(c) for c in cols[1:5])))
+    return entries
+
+
+def write_index(entries, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(INDEX_HEADER + "\n")
+        for e in entries:
+            f.write(f"{e.name}\t{e.length}\t{e.offset}\t{e.linebases}\t{e.linewidth}\n")
@@ -0,0 +1,197 @@
+import numpy as np
+
+from packed_seq import INVALID, KMER128, PackedSeq, encode, kmer_codes, kmer_dtype, valid_windows
+
+BATCH_BASES = 1 << 21
+_SEP = np.array([INVALID], dtype=np.uint8)
+
+
+def argsort_kmers(keys):
+    # structured compares are slow in NumPy; sort 128-bit keys by (hi, lo) columns
+    if keys.dtype == KMER128:
+        return np.lexsort((keys["lo"], keys["hi"]))
+    return np.argsort(keys)
+
+
+def run_starts(sorted_keys):
+    """Indices where a new key starts in a sorted k-mer array."""
+    if sorted_keys.dtype == KMER128:
+        diff = (sorted_keys["hi"][1:] != sorted_keys["hi"][:-1]) | (sorted_keys["lo"][1:] != sorted_keys["lo"][:-1])
+    else:
+        diff = sorted_keys[1:] != sorted_keys[:-1]
+    return np.flatnonzero(np.concatenate(([True], diff)))
+
+
+def join_codes(text, codes):
+    """One code array for a batch of byte reads and code arrays, with an
+    INVALID separator after each so no k-mer spans two reads."""
+    parts = []
+    if text:
+        parts.append(encode(b"N".join(text)))
+    parts.extend(codes)
+    if not parts:
+        return None
+    sep_parts = []
+    for p in parts:
+        sep_parts.append(p)
+        sep_parts.append(_SEP)
+    return np.concatenate(sep_parts)
+
+
+def code_batches(reads, batch_bases=BATCH_BASES):
+    """Yield joined code arrays (see join_codes) of about batch_bases bases."""
+    text = []
+    codes = []
+    buffered = 0
+    for r in reads:
+        if isinstance(r, PackedSeq):
+            codes.append(r.codes())
+        else:
+            text.append(r.encode("ascii") if isinstance(r, str) else bytes(r))
+        buffered += len(r)
+        if buffered >= batch_bases:
+            yield join_codes(text, codes)
+            text = []
+            codes = []
+            buffered = 0
+    batch = join_codes(text, codes)
+    if batch is not None:
+        yield batch
+
+
+def kmer_batches(reads, k, canonical=True, batch_bases=BATCH_BASES):
+    """Yield the valid packed k-mers of `reads`, one array per batch."""
+    for batch in code_batches(reads, batch_bases):
+        yield kmer_codes(batch, k, canonical)[valid_windows(batch, k)]
+
+
+def sum_by_key(keys, counts):
+    """Sort `keys` and add up the counts of equal keys."""
+    if len(keys) == 0:
+        return keys, counts
+    order = argsort_kmers(keys)
+    keys = keys[order]
+    counts = counts[order]
+    starts = run_starts(keys)
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+class KmerTable:
+    """Distinct packed k-mers (sorted) with their counts."""
+
+    def __init__(self, k, canonical, keys, counts):
+        self.k = k
+        self.canonical = canonical
+        self.keys = keys
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.keys)
+
+    def solid(self, min_count):
+        return self.keys[self.counts >= min_count]
+
+    def lookup(self, kmers):
+        """Counts of the given packed k-mers (0 for unseen ones)."""
+        if len(self.keys) == 0:
+            return np.zeros(len(kmers), dtype=np.int64)
+        pos = np.searchsorted(self.keys, kmers)
+        pos[pos == len(self.keys)] = 0
+        return np.where(self.keys[pos] == kmers, self.counts[pos], 0)
+
+    def histogram(self):
+        """Number of distinct k-mers seen exactly c times, indexed by c."""
+        return np.bincount(self.counts) if len(self.counts) else np.zeros(1, dtype=np.int64)
+
+
+class KmerCounter:
+    """Streaming k-mer counter: reads are encoded in batches and their packed
+    k-mers are folded into a sort-and-unique table, never as strings."""
+
+    def __init__(self, k, canonical=True, batch_bases=BATCH_BASES, prefilter=None, prefilter_min=2):
+        self.k = k
+        self.canonical = canonical
+        self.batch_bases = batch_bases
+        # optional sketch (kmer_sketch.CountMinSketch): k-mers it has seen
+        # fewer than prefilter_min times never enter the exact table
+        self.prefilter = prefilter
+        self.prefilter_min = prefilter_min
+        self.filtered = 0
+        self.dtype = kmer_dtype(k)
+        self._text = []
+        self._codes = []
+        self._buffered = 0
+        self._keys = np.zeros(0, dtype=self.dtype)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._runs = []
+        self._run_size = 0
+        self.bases = 0
+
+    def add(self, read):
+        if isinstance(read, PackedSeq):
+            self._codes.append(read.codes())
+        else:
+            self._text.append(read.encode("ascii") if isinstance(read, str) else bytes(read))
+        self._buffered += len(read)
+        self.bases += len(read)
+        if self._buffered >= self.batch_bases:
+            self._flush()
+
+    def update(self, reads):
+        for r in reads:
+            self.add(r)
+        return self
+
+    def add_codes(self, codes):
+        """Count the k-mers of one encoded sequence (values > 3 break k-mers)."""
+        keep = valid_windows(codes, self.k)
+        if keep.any():
+            self.add_kmers(kmer_codes(codes, self.k, self.canonical)[keep])
+
+    def add_kmers(self, kmers, counts=None):
+        if self.prefilter is not None:
+            keep = self.prefilter.query(kmers) >= self.prefilter_min
+            self.filtered += len(kmers) - int(np.count_nonzero(keep))
+            kmers = kmers[keep]
+            if counts is not None:
+                counts = counts[keep]
+        if counts is None:
+            if kmers.dtype == KMER128:
+                kmers, counts = sum_by_key(kmers, np.ones(len(kmers), dtype=np.int64))
+            else:
+                kmers, counts = np.unique(kmers, return_counts=True)
+        self._runs.append((kmers, counts))
+        self._run_size += len(kmers)
+        # merge once the pending runs outgrow the table: amortized O(n log n)
+        if self._run_size >= max(len(self._keys), 1 << 20):
+            self._merge()
+
+    def _flush(self):
+        batch = join_codes(self._text, self._codes)
+        if batch is not None:
+            self.add_codes(batch)
+        self._text = []
+        self._codes = []
+        self._buffered = 0
+
+    def _merge(self):
+        if not self._runs:
+            return
+        keys = np.concatenate([self._keys] + [r[0] for r in self._runs])
+        counts = np.concatenate([self._counts] + [r[1] for r in self._runs])
+        self._keys, self._counts = sum_by_key(keys, counts)
+        self._runs = []
+        self._run_size = 0
+
+    def table(self):
+        self._flush()
+        self._merge()
+        return KmerTable(self.k, self.canonical, self._keys, self._counts)
+
+
+def count_kmers(reads, k, canonical=True, batch_bases=BATCH_BASES, prefilter=None, prefilter_min=2):
+    return KmerCounter(k, canonical, batch_bases, prefilter, prefilter_min).update(reads).table()
+
+
+def solid_kmers(reads, k, canonical=True, min_count=2):
+    return count_kmers(reads, k, canonical).solid(min_count)
@@ -0,0 +1,267 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from kmer_count import KmerCounter, KmerTable, argsort_kmers, join_codes, sum_by_key
+from packed_seq import INVALID, PackedSeq, hash_kmers, kmer_codes, kmer_dtype, mix64, valid_windows
+
+MEMORY_BUDGET = 256 << 20
+N_BUCKETS = 64
+MINIMIZER_LEN = 19
+
+# Rough peak bytes of NumPy working memory per input base: m-mer codes,
+# their hashes and window minima while partitioning; forward, reverse,
+# canonical and sorted k-mer copies while counting a bucket.
+PARTITION_BYTES_PER_BASE = 96
+_SEP = np.array([INVALID], dtype=np.uint8)
+
+
+def count_bytes_per_base(k):
+    return 10 * kmer_dtype(k).itemsize + 16
+
+
+def window_min(x, w):
+    """Minimum of every window of `w` consecutive values (doubling passes)."""
+    n = len(x) - w + 1
+    if n <= 0:
+        return x[:0]
+    out = x
+    width = 1
+    while width < w:
+        step = min(width, w - width)
+        out = np.minimum(out[:len(out) - step], out[step:])
+        width += step
+    return out[:n]
+
+
+def minimizers(codes, k, m=MINIMIZER_LEN, canonical=True):
+    """Hashed minimizer of every k-mer: smallest hash over its m-mers.
+
+    With canonical m-mers a k-mer and its reverse complement get the same
+    minimizer, so both strands land in one bucket."""
+    m = min(m, k, 32)
+    return window_min(mix64(kmer_codes(codes, m, canonical)), k - m + 1)
+
+
+def _count_codes(codes, k, canonical):
+    counter = KmerCounter(k, canonical)
+    counter.add_codes(codes)
+    return counter.table()
+
+
+def _iter_code_chunks(path, chunk_bytes):
+    # read separator-terminated super-k-mers in pieces of about chunk_bytes
+    pending = np.zeros(0, dtype=np.uint8)
+    with open(path, "rb") as f:
+        while True:
+            chunk = np.frombuffer(f.read(chunk_bytes), dtype=np.uint8)
+            if not len(chunk):
+                break
+            chunk = np.concatenate((pending, chunk))
+            cut = np.flatnonzero(chunk == INVALID)
+            if not len(cut):
+                pending = chunk
+                continue
+            yield chunk[:cut[-1] + 1]
+            pending = chunk[cut[-1] + 1:]
+    if len(pending):
+        yield pending
+
+
+def _count_large_bucket(path, k, canonical, budget, min_count, tmp_dir):
+    # Count the bucket in budget-sized pieces and spill each partial table
+    # into sub-buckets by k-mer hash; each sub-bucket then fits the budget.
+    rec = np.dtype([("key", kmer_dtype(k)), ("count", "<i8")])
+    size = os.path.getsize(path)
+    n_sub = -(-size * rec.itemsize * 4 // budget) + 1
+    sub_dir = tempfile.mkdtemp(dir=tmp_dir)
+    try:
+        files = [open(os.path.join(sub_dir, f"{i:04d}.bin"), "wb") for i in range(n_sub)]
+        try:
+            for codes in _iter_code_chunks(path, max(budget // count_bytes_per_base(k), 1 << 16)):
+                t = _count_codes(codes, k, canonical)
+                sub = (hash_kmers(t.keys, 1) % np.uint64(n_sub)).astype(np.int64)
+                order = np.argsort(sub, kind="stable")
+                records = np.empty(len(t), dtype=rec)
+                records["key"] = t.keys[order]
+                records["count"] = t.counts[order]
+                bounds = np.searchsorted(sub[order], np.arange(n_sub + 1))
+                for i in range(n_sub):
+                    if bounds[i + 1] > bounds[i]:
+                        records[bounds[i]:bounds[i + 1]].tofile(files[i])
+        finally:
+            for f in files:
+                f.close()
+        keys = []
+        counts = []
+        for f in files:
+            records = np.fromfile(f.name, dtype=rec)
+            ks, cs = sum_by_key(records["key"], records["count"])
+            del records
+            keep = cs >= min_count
+            keys.append(ks[keep])
+            counts.append(cs[keep])
+        keys = np.concatenate(keys)
+        counts = np.concatenate(counts)
+        order = argsort_kmers(keys)
+        return KmerTable(k, canonical, keys[order], counts[order])
+    finally:
+        shutil.rmtree(sub_dir, ignore_errors=True)
+
+
+def count_bucket(path, k, canonical, budget=MEMORY_BUDGET, min_count=1):
+    """Count the super-k-mers of one bucket file, keeping k-mers seen
+    at least `min_count` times."""
+    if os.path.getsize(path) * count_bytes_per_base(k) > budget:
+        return _count_large_bucket(path, k, canonical, budget, min_count, os.path.dirname(path))
+    t = _count_codes(np.fromfile(path, dtype=np.uint8), k, canonical)
+    if min_count > 1:
+        keep = t.counts >= min_count
+        t = KmerTable(k, canonical, t.keys[keep], t.counts[keep])
+    return t
+
+
+class PartitionedKmerCounter:
+    """Out-of-core k-mer counter with the KmerCounter interface.
+
+    Reads are cut into super-k-mers (runs of consecutive k-mers that share a
+    minimizer) which are appended to one of `n_buckets` files on disk. Each
+    bucket holds every copy of its k-mers, so buckets are counted one at a
+    time (or one per worker) and working memory stays within
+    `memory_budget` bytes whatever the input size."""
+
+    def __init__(self, k, canonical=True, memory_budget=MEMORY_BUDGET, n_buckets=N_BUCKETS,
+                 minimizer_len=MINIMIZER_LEN, tmp_dir=None, workers=1, prefilter=None, prefilter_min=2):
+        self.k = k
+        self.canonical = canonical
+        self.dtype = kmer_dtype(k)
+        self.memory_budget = memory_budget
+        self.n_buckets = n_buckets
+        self.minimizer_len = minimizer_len
+        self.workers = max(workers, 1)
+        self.prefilter = prefilter
+        self.prefilter_min = prefilter_min
+        self.filtered = 0
+        self.batch_bases = max(memory_budget // PARTITION_BYTES_PER_BASE, 1 << 12)
+        self.dir = tempfile.mkdtemp(prefix="kmers_", dir=tmp_dir)
+        self.paths = [os.path.join(self.dir, f"bucket_{i:04d}.bin") for i in range(n_buckets)]
+        self._files = [open(p, "wb") for p in self.paths]
+        self.bucket_bytes = np.zeros(n_buckets, dtype=np.int64)
+        self._text = []
+        self._codes = []
+        self._buffered = 0
+        self.bases = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._close_files()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _close_files(self):
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def add(self, read):
+        if isinstance(read, PackedSeq):
+            self._codes.append(read.codes())
+        else:
+            self._text.append(read.encode("ascii") if isinstance(read, str) else bytes(read))
+        self._buffered += len(read)
+        self.bases += len(read)
+        if self._buffered >= self.batch_bases:
+            self._flush()
+
+    def update(self, reads):
+        for r in reads:
+            self.add(r)
+        return self
+
+    def _flush(self):
+        batch = join_codes(self._text, self._codes)
+        self._text = []
+        self._codes = []
+        self._buffered = 0
+        if batch is not None:
+            self.add_codes(batch)
+
+    def add_codes(self, codes):
+        """Partition the k-mers of one encoded sequence into the bucket files."""
+        k = self.k
+        n = len(codes) - k + 1
+        if n <= 0:
+            return
+        bucket = (mix64(minimizers(codes, k, self.minimizer_len, self.canonical))
+                  % np.uint64(self.n_buckets)).astype(np.int64)
+        keep = valid_windows(codes, k)
+        if self.prefilter is not None:
+            # k-mers the sketch saw too rarely are never written to disk
+            passed = self.prefilter.query(kmer_codes(codes, k, self.canonical)) >= self.prefilter_min
+            self.filtered += int(np.count_nonzero(keep & ~passed))
+            keep &= passed
+        bucket[~keep] = -1
+
+        # runs of k-mers with the same bucket become one super-k-mer
+        change = np.flatnonzero(bucket[1:] != bucket[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change, [n]))
+        run_bucket = bucket[starts]
+        sel = run_bucket >= 0
+        starts, ends, run_bucket = starts[sel], ends[sel], run_bucket[sel]
+        order = np.argsort(run_bucket, kind="stable")
+        starts, ends, run_bucket = starts[order], ends[order], run_bucket[order]
+
+        # gather codes[s:e+k-1] plus a separator for every run, grouped by bucket
+        lens = ends - starts + k
+        out_end = np.cumsum(lens)
+        idx = np.arange(out_end[-1] if len(out_end) else 0) - np.repeat(out_end - lens - starts, lens)
+        out = np.concatenate((codes, _SEP))[idx]
+        out[out_end - 1] = INVALID
+        bounds = np.searchsorted(run_bucket, np.arange(self.n_buckets + 1))
+        for b in np.flatnonzero(bounds[1:] > bounds[:-1]):
+            lo = out_end[bounds[b]] - lens[bounds[b]]
+            hi = out_end[bounds[b + 1] - 1]
+            out[lo:hi].tofile(self._files[b])
+            self.bucket_bytes[b] += hi - lo
+
+    def iter_tables(self, min_count=1):
+        """Yield one KmerTable per non-empty bucket (keys sorted within it)."""
+        self._flush()
+        self._close_files()
+        paths = [p for p, size in zip(self.paths, self.bucket_bytes) if size]
+        args = (self.k, self.canonical, self.memory_budget // self.workers, min_count)
+        if self.workers == 1:
+            for p in paths:
+                yield count_bucket(p, *args)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(count_bucket, p, *args) for p in paths]
+            for fut in futures:
+                yield fut.result()
+
+    def table(self, min_count=1):
+        tables = list(self.iter_tables(min_count))
+        if not tables:
+            return KmerTable(self.k, self.canonical, np.zeros(0, dtype=self.dtype), np.zeros(0, dtype=np.int64))
+        keys = np.concatenate([t.keys for t in tables])
+        counts = np.concatenate([t.counts for t in tables])
+        order = argsort_kmers(keys)
+        return KmerTable(self.k, self.canonical, keys[order], counts[order])
+
+    def solid(self, min_count):
+        return self.table(min_count).keys
+
+
+def count_kmers_on_disk(reads, k, canonical=True, memory_budget=MEMORY_BUDGET, n_buckets=N_BUCKETS,
+                        tmp_dir=None, workers=1, min_count=1, prefilter=None):
+    with PartitionedKmerCounter(k, canonical, memory_budget, n_buckets, tmp_dir=tmp_dir, workers=workers,
+                                prefilter=prefilter, prefilter_min=min_count) as counter:
+        return counter.update(reads).table(min_count)
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+from kmer_cardinality import estimate_distinct
+from kmer_count import BATCH_BASES, kmer_batches
+from packed_seq import hash_kmers
+
+DEPTH = 4
+MAX_COUNT = 255
+
+
+class CountMinSketch:
+    """Count-min sketch over packed k-mers: `depth` rows of `width` 8-bit
+    saturating counters. A query returns the smallest of the k-mer's
+    counters, which never undercounts; k-mers that collide with others in
+    every row are overcounted (the false positives of the pre-filter)."""
+
+    def __init__(self, width, depth=DEPTH, seed=0):
+        self.width = int(width)
+        self.depth = int(depth)
+        self.salts = [0x9E3779B97F4A7C15 * (seed * depth + i + 1) % (1 << 64) for i in range(depth)]
+        self.table = np.zeros((self.depth, self.width), dtype=np.uint8)
+        self.inserted = 0
+
+    @classmethod
+    def for_fpr(cls, n_kmers, fpr=0.01, seed=0):
+        """Size the sketch so that about `fpr` of the singletons among
+        `n_kmers` distinct k-mers pass a count >= 2 query."""
+        depth = max(1, math.ceil(math.log2(1 / fpr)))
+        return cls(max(64, math.ceil(n_kmers / math.log(2))), depth, seed)
+
+    @classmethod
+    def for_memory(cls, memory_bytes, depth=DEPTH, seed=0):
+        return cls(max(64, memory_bytes // depth), depth, seed)
+
+    @property
+    def memory_bytes(self):
+        return self.table.nbytes
+
+    def _rows(self, kmers):
+        width = np.uint64(self.width)
+        for row, salt in enumerate(self.salts):
+            yield row, (hash_kmers(kmers, salt) % width).astype(np.intp)
+
+    def add(self, kmers, counts=None):
+        if counts is None:
+            counts = np.ones(len(kmers), dtype=np.int64)
+        self.inserted += len(kmers)
+        for row, idx in self._rows(kmers):
+            cells, inv = np.unique(idx, return_inverse=True)
+            added = np.bincount(inv.ravel(), weights=counts, minlength=len(cells))
+            self.table[row, cells] = np.minimum(self.table[row, cells] + added, MAX_COUNT)
+
+    def query(self, kmers):
+        out = None
+        for row, idx in self._rows(kmers):
+            vals = self.table[row, idx]
+            out = vals if out is None else np.minimum(out, vals)
+        return out if out is not None else np.zeros(len(kmers), dtype=np.uint8)
+
+    def update(self, reads, k, canonical=True, batch_bases=BATCH_BASES):
+        """Sketch every k-mer of `reads` (first pass of the pre-filter)."""
+        for kmers in kmer_batches(reads, k, canonical, batch_bases):
+            self.add(kmers)
+        return self
+
+    def occupancy(self):
+        """Fraction of non-zero counters, averaged over the rows."""
+        return float(np.count_nonzero(self.table)) / self.table.size
+
+    def estimated_fpr(self, min_count=2):
+        # a singleton passes when, in every row, other k-mers have already
+        # put at least min_count - 1 into its counter
+        per_row = np.count_nonzero(self.table >= min_count - 1, axis=1) / self.width
+        return float(np.prod(per_row))
+
+    def report(self, min_count=2):
+        return (f"count-min sketch: {self.depth} x {self.width} counters, "
+                f"{self.memory_bytes / (1 << 20):.1f} MiB, {self.inserted} k-mers inserted, "
+                f"occupancy {self.occupancy():.3f}, est. FPR(count >= {min_count}) {self.estimated_fpr(min_count):.4f}")
+
+
+def sketch_kmers(reads, k, canonical=True, fpr=0.01, memory_bytes=None, n_kmers=None, seed=0):
+    """First pass: a sketch of every k-mer in `reads`, sized by memory_bytes
+    or, failing that, by the target fpr for n_kmers distinct k-mers (default:
+    a HyperLogLog estimate, which takes one more pass over `reads`)."""
+    if memory_bytes:
+        sketch = CountMinSketch.for_memory(memory_bytes, seed=seed)
+    else:
+        if n_kmers is None:
+            if iter(reads) is reads:
+                raise TypeError("sizing a sketch by fpr reads the input twice; pass memory_bytes or n_kmers, "
+                                "or a re-iterable source such as fasta_io.ReadFile")
+            n_kmers = estimate_distinct(reads, [k], canonical)[k].estimate()
+        sketch = CountMinSketch.for_fpr(n_kmers, fpr, seed)
+    return sketch.update(reads, k, canonical)
@@ -0,0 +1,82 @@
+from itertools import product
+
+import numpy as np
+
+from fasta_io import iter_fasta
+from kmer_count import KmerTable, count_kmers, kmer_batches
+from packed_seq import BASES, decode_kmer, encode, kmer_codes, kmer_dtype, kmers_to_ints
+
+# up to this k every possible k-mer gets a column (4**12 = 16.7M counters);
+# beyond it only the k-mers that occur are kept, via sort-and-unique
+DENSE_MAX_K = 12
+# largest k a dense spectrum may be asked for: 4**13 int64 counters are
+# already 537 MB per source, 4**16 would be 34 GB
+DENSE_LIMIT_K = 12
+
+
+def kmer_labels(keys, k):
+    """Strings for packed k-mer keys (all 4**k of them when keys is None)."""
+    if keys is None:
+        return ["".join(p) for p in product(BASES, repeat=k)]
+    return [decode_kmer(v, k) for v in kmers_to_ints(keys)]
+
+
+def _as_records(source):
+    # one sequence, or an iterable of records that form one source
+    if isinstance(source, (str, bytes, bytearray)):
+        return [source]
+    return source
+
+
+def kmer_spectrum(source, k, canonical=False, dense=None):
+    """(keys, counts) of the k-mers of one sequence or record iterable.
+
+    Dense (k <= DENSE_MAX_K by default): keys are all 4**k codes in
+    lexicographic order and counts come from bincount. Sparse: only the
+    k-mers present, sorted, from the sort-and-unique KmerCounter."""
+    if dense is None:
+        dense = k <= DENSE_MAX_K
+    records = _as_records(source)
+    if dense:
+        if k > DENSE_LIMIT_K:
+            raise ValueError(f"dense spectra need k <= {DENSE_LIMIT_K}, got {k}; use dense=False")
+        size = 4 ** k
+        counts = np.zeros(size, dtype=np.int64)
+        for kmers in kmer_batches(records, k, canonical):
+            counts += np.bincount(kmers.astype(np.intp), minlength=size)
+        return np.arange(size, dtype=kmer_dtype(k)), counts
+    table = count_kmers(records, k, canonical)
+    return table.keys, table.counts
+
+
+def spectrum_matrix(sources, k, canonical=False, dense=None):
+    """k-mer counts of many sources as one (n_sources, n_kmers) matrix.
+
+    Each source is a sequence or an iterable of records; sparse columns are
+    the sorted union of the k-mers seen in any source."""
+    if dense is None:
+        dense = k <= DENSE_MAX_K
+    spectra = [kmer_spectrum(src, k, canonical, dense) for src in sources]
+    if not spectra:
+        return np.zeros(0, dtype=kmer_dtype(k)), np.zeros((0, 0), dtype=np.int64)
+    if dense:
+        return spectra[0][0], np.vstack([c for _, c in spectra])
+    keys = np.unique(np.concatenate([kk for kk, _ in spectra]))
+    matrix = np.zeros((len(spectra), len(keys)), dtype=np.int64)
+    for row, (kk, cc) in zip(matrix, spectra):
+        row[np.searchsorted(keys, kk)] = cc
+    return keys, matrix
+
+
+def fasta_spectrum_matrix(paths, k, canonical=False, dense=None):
+    """spectrum_matrix with one row per FASTA file (all its records)."""
+    sources = [(seq for _, seq in iter_fasta(p)) for p in paths]
+    return spectrum_matrix(sources, k, canonical, dense)
+
+
+def count_kmers_of(keys, counts, kmers):
+    """Counts of the given k-mer strings in a (keys, counts) spectrum."""
+    k = len(kmers[0]) if kmers else 1
+    # one encode pass over all queries, taking the k-mer at each start
+    codes = kmer_codes(encode("N".join(kmers)), k)[::k + 1]
+    return KmerTable(k, False, keys, counts).lookup(codes)
@@ -1,18 +1,28 @@
+import sys
+import time
+
+from seq_type import alphabet_mask, classify_files, kind_of
+
 def detectSeq(seq: str) -> str:
-    dna = set("ACGT")
-    rna = set("ACGU")
-    protein = set("ACDEFGHIKLMNPQRSTVWY")
+    return kind_of(alphabet_mask(seq.encode("latin-1", "replace")))
 
-    letters = set(seq.upper())
+def classify_report(paths):
+    # one row per record; the alphabet mask is built from a byte lookup table
+    start = time.perf_counter()
+    total = 0
+    counts = {}
+    print(f"{'File':<30}{'Record':<40}{'Length':>12}  Type")
+    for path, rec in classify_files(paths):
+        total += rec.length
+        counts[rec.kind] = counts.get(rec.kind, 0) + 1
+        print(f"{path[-29:]:<30}{rec.name[:39]:<40}{rec.length:>12}  {rec.kind}")
+    secs = time.perf_counter() - start
+    summary = ", ".join(f"{k}: {v}" for k, v in sorted(counts.items()))
+    print(f"\n{sum(counts.values())} records ({summary}), {total} residues "
+          f"in {secs:.3f} s ({total / max(secs, 1e-9) / 1e6:.1f} M residues/s)")
 
-    if letters.issubset(dna):
-        return "DNA"
-    elif letters.issubset(rna):
-        return "RNA"
-    elif letters.issubset(protein):
-        return "Protein"
-    else:
-        return "Unknown"
-    
-seq = input("Introduce the sequence: ")
-print("Type:", detectSeq(seq))
+if len(sys.argv) > 1:
+    classify_report(sys.argv[1:])
+else:
+    seq = input("Introduce the sequence: ")
+    print("Type:", detectSeq(seq))
@@ -1,38 +1,79 @@
+import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from collections import Counter
+from bgzf import is_gzip
+from fasta_io import INDEX_SUFFIX, FastaIndex, iter_fai, write_index
 
-def read_fasta(path):
-    header = None
-    chunks = []
-    with open(path, "r", encoding="utf-8") as f:
-        for raw in f:
-            line = raw.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    yield header, "".join(chunks)
-                header = line[1:].strip()
-                chunks = []
-            else:
-                chunks.append(line)
-    if header is not None:
-        yield header, "".join(chunks)
+POLL_MS = 50
+BATCH_RECORDS = 500
 
-def clean_sequence(seq: str) -> str:
-    s = seq.upper()
-    return "".join(ch for ch in s if ch.isalpha())
+def symbol_counts(chunks) -> Counter:
+    cnt = Counter()
+    for chunk in chunks:
+        chunk = chunk.upper()
+        for b in set(chunk):
+            if 65 <= b <= 90:
+                cnt[chr(b)] += chunk.count(b)
+    return cnt
 
-def percentages(seq: str):
-    s = clean_sequence(seq)
-    if not s:
-        return [], 0
-    cnt = Counter(s)
+def rows_from_counts(cnt):
     total = sum(cnt.values())
+    if not total:
+        return [], 0
     rows = [(sym, cnt[sym], (cnt[sym]/total)*100) for sym in sorted(cnt)]
     return rows, total
 
+class Cancelled(Exception):
+    pass
+
+def load_worker(path, out, cancel):
+    """Index the file, posting finished entries to `out` in batches; the Tk
+    thread drains the queue. Composition is left to composition_worker."""
+    size = None if is_gzip(path) else os.path.getsize(path)  # no total for compressed input
+    batch = []
+    entries = []
+
+    def on_block(offset, _data):
+        if cancel.is_set():
+            raise Cancelled
+        out.put(("progress", offset, size))
+
+    try:
+        for entry in iter_fai(path, on_block):
+            if cancel.is_set():
+                raise Cancelled
+            entries.append(entry)
+            batch.append(entry)
+            if len(batch) >= BATCH_RECORDS:
+                out.put(("records", batch))
+                batch = []
+        if batch:
+            out.put(("records", batch))
+        try:
+            write_index(entries, path + INDEX_SUFFIX)
+        except OSError:
+            pass
+        out.put(("done",))
+    except Cancelled:
+        out.put(("cancelled",))
+    except Exception as e:
+        out.put(("error", str(e)))
+
+def composition_worker(path, entry, i, out, cancel):
+    """Count the symbols of one indexed record and post them to `out`."""
+    counts = Counter()
+    try:
+        for chunk in FastaIndex(path, [entry]).iter_raw(0):
+            if cancel.is_set():
+                return
+            counts.update(symbol_counts([chunk]))
+        out.put(("composition", i) + rows_from_counts(counts))
+    except Exception as e:
+        out.put(("error", str(e)))
+
 class FastaGUI(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -42,6 +83,10 @@ class FastaGUI(tk.Tk):
         top = ttk.Frame(self, padding=8)
         top.pack(side=tk.TOP, fill=tk.X)
         ttk.Button(top, text="Open FASTA…", command=self.open_fasta).pack(side=tk.LEFT)
+        self.cancel_btn = ttk.Button(top, text="Cancel", command=self.cancel_load, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=(6, 0))
+        self.progress = ttk.Progressbar(top, length=160, mode="determinate", maximum=1000)
+        self.progress.pack(side=tk.LEFT, padx=8)
         self.path_var = tk.StringVar(value="No file selected.")
         ttk.Label(top, textvariable=self.path_var).pack(side=tk.LEFT, padx=8)
 
@@ -70,50 +115,148 @@ class FastaGUI(tk.Tk):
         self.tree.column("pct", width=120, anchor="e")
         self.tree.pack(fill=tk.BOTH, expand=True)
 
-        self.records = []  
+        self.records = []
+        self.path = None
+        self.queue = None
+        self.cancel_event = None
+        self.comp_queue = None
+        self.comp_cancel = None
+
     def open_fasta(self):
         path = filedialog.askopenfilename(
             title="Open FASTA file",
-            filetypes=[("FASTA files", "*.fa *.fasta *.fna *.faa *.txt"), ("All files", "*.*")]
+            filetypes=[("FASTA files", "*.fa *.fasta *.fna *.faa *.txt *.gz"), ("All files", "*.*")]
         )
         if not path:
             return
-        try:
-            recs = list(read_fasta(path))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to read file:\n{e}")
-            return
-        if not recs:
-            messagebox.showwarning("Warning", "No FASTA records found in file.")
-            return
+        self.cancel_load()
+        self.cancel_composition()
 
+        self.path = path
         self.path_var.set(path)
         self.records.clear()
         self.listbox.delete(0, tk.END)
         self.tree.delete(*self.tree.get_children())
+        self.progress.config(value=0)
+
+        # a fresh index lists the records at once; otherwise the file is scanned
+        index = FastaIndex.cached(path)
+        if index is not None:
+            self.add_records(index.entries)
+            self.finish_load(("done",))
+            return
+
+        self.info_var.set("Loading…")
+        # a fresh queue per load: messages from a cancelled worker are ignored
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.cancel_btn.config(state="normal")
+        threading.Thread(target=load_worker, args=(path, self.queue, self.cancel_event), daemon=True).start()
+        self.after(POLL_MS, self.poll_worker, self.queue)
 
-        for idx, (header, seq) in enumerate(recs, start=1):
-            rows, total = percentages(seq)
-            item = {
-                "header": header or f"record_{idx}",
-                "rows": rows,
-                "total": total
-            }
-            self.records.append(item)
-            self.listbox.insert(tk.END, item["header"])
-
-        self.info_var.set("Select a sequence on the left to view composition.")
-        if self.records:
+    def cancel_load(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+
+    def cancel_composition(self):
+        if self.comp_cancel is not None:
+            self.comp_cancel.set()
+        self.comp_queue = None
+
+    def poll_worker(self, q):
+        if q is not self.queue:
+            return
+        while True:
+            try:
+                msg = q.get_nowait()
+            except queue.Empty:
+                break
+            kind = msg[0]
+            if kind == "progress":
+                if msg[2] is None:
+                    self.progress.step(10)
+                else:
+                    self.progress.config(value=min(1000, 1000 * msg[1] / max(msg[2], 1)))
+            elif kind == "records":
+                self.add_records(msg[1])
+            else:
+                self.finish_load(msg)
+                return
+        self.after(POLL_MS, self.poll_worker, q)
+
+    def add_records(self, entries):
+        first = not self.records
+        n = len(self.records)
+        batch = [{"header": e.name or f"record_{n + j}", "entry": e, "rows": None, "total": None}
+                 for j, e in enumerate(entries, 1)]
+        self.records.extend(batch)
+        self.listbox.insert(tk.END, *(item["header"] for item in batch))
+        self.info_var.set(f"Loading… {len(self.records)} records so far. Select one to view composition.")
+        if first and batch:
             self.listbox.selection_set(0)
             self.on_select(None)
 
+    def finish_load(self, msg):
+        self.cancel_btn.config(state="disabled")
+        self.queue = None
+        kind = msg[0]
+        if kind == "done":
+            self.progress.config(value=1000)
+            if not self.records:
+                self.info_var.set("Open a FASTA file to begin.")
+                messagebox.showwarning("Warning", "No FASTA records found in file.")
+            elif not self.listbox.curselection():
+                self.info_var.set("Select a sequence on the left to view composition.")
+            else:
+                rec = self.records[self.listbox.curselection()[0]]
+                if rec["rows"] is not None:
+                    self.show_record(rec)
+                else:
+                    self.info_var.set(f"{rec['header']}  |  Counting…")
+        elif kind == "cancelled":
+            self.info_var.set(f"Loading cancelled after {len(self.records)} records.")
+        else:
+            self.info_var.set("Open a FASTA file to begin.")
+            messagebox.showerror("Error", f"Failed to read file:\n{msg[1]}")
+
     def on_select(self, _event):
         sel = self.listbox.curselection()
         if not sel:
             return
         i = sel[0]
         rec = self.records[i]
+        self.tree.delete(*self.tree.get_children())
+        if rec["rows"] is not None:
+            self.show_record(rec)
+            return
+        # only the selected record is counted, on a worker thread
+        self.info_var.set(f"{rec['header']}  |  Counting…")
+        self.cancel_composition()
+        self.comp_queue = queue.Queue()
+        self.comp_cancel = threading.Event()
+        threading.Thread(target=composition_worker,
+                         args=(self.path, rec["entry"], i, self.comp_queue, self.comp_cancel), daemon=True).start()
+        self.after(POLL_MS, self.poll_composition, self.comp_queue)
+
+    def poll_composition(self, q):
+        if q is not self.comp_queue:
+            return
+        try:
+            msg = q.get_nowait()
+        except queue.Empty:
+            self.after(POLL_MS, self.poll_composition, q)
+            return
+        self.comp_queue = None
+        if msg[0] == "error":
+            messagebox.showerror("Error", f"Failed to read record:\n{msg[1]}")
+            return
+        _, i, rows, total = msg
+        rec = self.records[i]
+        rec["rows"], rec["total"] = rows, total
+        if self.listbox.curselection() == (i,):
+            self.show_record(rec)
 
+    def show_record(self, rec):
         self.info_var.set(f"{rec['header']}  |  Length: {rec['total']}")
         self.tree.delete(*self.tree.get_children())
         if rec["total"] == 0:
@@ -0,0 +1,286 @@
+import numpy as np
+
+BASES = "ACGT"
+MAX_K = 64
+INVALID = 4
+
+ENCODE = np.full(256, INVALID, dtype=np.uint8)
+for _i, _b in enumerate(b"ACGT"):
+    ENCODE[_b] = _i
+    ENCODE[_b + 32] = _i
+DECODE = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+# k-mers up to 32 bases fit one uint64; up to 64 bases they are split into
+# `hi` (first k-32 bases) and `lo` (last 32 bases). Both orderings match the
+# lexicographic order of the A<C<G<T strings.
+KMER128 = np.dtype([("hi", "<u8"), ("lo", "<u8")])
+
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+
+def encode(seq):
+    """A/C/G/T (any case) -> 0..3, anything else -> 4, as a uint8 array."""
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+    return ENCODE[np.frombuffer(seq, dtype=np.uint8)]
+
+
+def decode(codes):
+    return DECODE[codes].tobytes().decode("ascii")
+
+
+def kmer_dtype(k):
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}, got {k}")
+    return np.dtype(np.uint64) if k <= 32 else KMER128
+
+
+def valid_windows(codes, k):
+    """True for every window of `k` codes that contains only A/C/G/T."""
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=bool)
+    bad = np.concatenate(([0], np.cumsum(codes > 3, dtype=np.int64)))
+    return bad[k:] == bad[:n]
+
+
+def window_codes(codes, k):
+    # Doubling: windows of width w and w' combine into w+w' with one shift/or
+    # pass, so a k-wide window costs O(log k) vectorized passes.
+    if not 1 <= k <= 32:
+        raise ValueError("window_codes handles 1 <= k <= 32")
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    block = (codes & 3).astype(np.uint64)
+    bw = 1
+    out = None
+    out_w = 0
+    rem = k
+    while rem:
+        if rem & 1:
+            if out is None:
+                out, out_w = block, bw
+            else:
+                m = len(out) - bw
+                out = (out[:m] << np.uint64(2 * bw)) | block[out_w:out_w + m]
+                out_w += bw
+        rem >>= 1
+        if rem:
+            m = len(block) - bw
+            block = (block[:m] << np.uint64(2 * bw)) | block[bw:bw + m]
+            bw *= 2
+    return out[:n]
+
+
+def kmer_codes(codes, k, canonical=False):
+    """Every k-mer of a code array, packed (uint64, or KMER128 for k > 32)."""
+    fwd = _forward_codes(codes, k)
+    if not canonical:
+        return fwd
+    rev = _forward_codes(3 - (codes[::-1] & 3), k)[::-1]
+    return canonical_of(fwd, rev)
+
+
+def _forward_codes(codes, k):
+    dt = kmer_dtype(k)
+    if k <= 32:
+        return window_codes(codes, k)
+    n = max(len(codes) - k + 1, 0)
+    out = np.empty(n, dtype=dt)
+    out["hi"] = window_codes(codes, k - 32)[:n]
+    out["lo"] = window_codes(codes[k - 32:], 32)[:n]
+    return out
+
+
+def canonical_of(fwd, rev):
+    if fwd.dtype != KMER128:
+        return np.minimum(fwd, rev)
+    take_fwd = (fwd["hi"] < rev["hi"]) | ((fwd["hi"] == rev["hi"]) & (fwd["lo"] <= rev["lo"]))
+    return np.where(take_fwd, fwd, rev)
+
+
+def revcomp_kmers(kmers, k):
+    """Reverse complement of packed k-mers, vectorized."""
+    if k <= 32:
+        return _revcomp64(kmers, k)
+    # rc(hi + lo) = rc(lo) + rc(hi); re-split that into h and 32 bases
+    out = np.empty(len(kmers), dtype=KMER128)
+    lo_rc = _revcomp64(kmers["lo"], 32)
+    hi_rc = _revcomp64(kmers["hi"], k - 32)
+    h = k - 32
+    if h == 32:
+        out["hi"], out["lo"] = lo_rc, hi_rc
+    else:
+        out["hi"] = lo_rc >> np.uint64(2 * (32 - h))
+        out["lo"] = ((lo_rc & np.uint64((1 << (2 * (32 - h))) - 1)) << np.uint64(2 * h)) | hi_rc
+    return out
+
+
+def _revcomp64(x, k):
+    x = ~np.asarray(x, dtype=np.uint64)
+    # reverse the order of the 2-bit groups within the word
+    x = ((x >> np.uint64(2)) & np.uint64(0x3333333333333333)) | ((x & np.uint64(0x3333333333333333)) << np.uint64(2))
+    x = ((x >> np.uint64(4)) & np.uint64(0x0F0F0F0F0F0F0F0F)) | ((x & np.uint64(0x0F0F0F0F0F0F0F0F)) << np.uint64(4))
+    x = x.byteswap()
+    return x >> np.uint64(64 - 2 * k)
+
+
+def kmer_prefix(kmers, k):
+    """Packed (k-1)-mers made of the first k-1 bases of each k-mer."""
+    if k <= 32:
+        return kmers >> np.uint64(2)
+    lo = (kmers["lo"] >> np.uint64(2)) | ((kmers["hi"] & np.uint64(3)) << np.uint64(62))
+    if k == 33:
+        return lo
+    out = np.empty(len(kmers), dtype=KMER128)
+    out["hi"] = kmers["hi"] >> np.uint64(2)
+    out["lo"] = lo
+    return out
+
+
+def kmer_suffix(kmers, k):
+    """Packed (k-1)-mers made of the last k-1 bases of each k-mer."""
+    if k <= 32:
+        return kmers & np.uint64((1 << (2 * (k - 1))) - 1)
+    if k == 33:
+        return kmers["lo"].copy()
+    out = np.empty(len(kmers), dtype=KMER128)
+    out["hi"] = kmers["hi"] & np.uint64((1 << (2 * (k - 33))) - 1)
+    out["lo"] = kmers["lo"]
+    return out
+
+
+def kmers_to_ints(kmers):
+    """Packed k-mers as Python ints (hashable graph node ids)."""
+    if kmers.dtype != KMER128:
+        return kmers.tolist()
+    return [(h << 64) | l for h, l in zip(kmers["hi"].tolist(), kmers["lo"].tolist())]
+
+
+def ints_to_kmers(values, k):
+    """Inverse of kmers_to_ints for k-mers of length `k`."""
+    dtype = kmer_dtype(k)
+    if dtype != KMER128:
+        return np.array(values, dtype=np.uint64)
+    out = np.empty(len(values), dtype=KMER128)
+    out["hi"] = [v >> 64 for v in values]
+    out["lo"] = [v & 0xFFFFFFFFFFFFFFFF for v in values]
+    return out
+
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def mix64(x, salt=0):
+    """splitmix64 finalizer over a uint64 array (arithmetic wraps)."""
+    x = np.asarray(x, dtype=np.uint64) ^ np.uint64(salt)
+    x = (x ^ (x >> np.uint64(30))) * _M1
+    x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_kmers(kmers, salt=0):
+    """64-bit hashes of packed k-mers (uint64 or KMER128)."""
+    if kmers.dtype == KMER128:
+        return mix64(kmers["hi"] ^ mix64(kmers["lo"], salt), salt)
+    return mix64(kmers, salt)
+
+
+_QUADS = ["".join(BASES[(b >> s) & 3] for s in (6, 4, 2, 0)) for b in range(256)]
+
+
+def decode_kmer(value, k):
+    # left-align to whole bytes, then spell 4 bases per byte
+    nbytes = (k + 3) // 4
+    raw = (value << (2 * (nbytes * 4 - k))).to_bytes(nbytes, "big")
+    return "".join([_QUADS[b] for b in raw])[:k]
+
+
+def encode_kmer(kmer):
+    value = 0
+    for ch in kmer:
+        value = (value << 2) | BASES.index(ch)
+    return value
+
+
+class PackedSeq:
+    """A/C/G/T sequence stored at 2 bits per base; slices share the buffer."""
+
+    __slots__ = ("_data", "_start", "_len")
+
+    def __init__(self, data, start=0, length=None):
+        self._data = data
+        self._start = start
+        self._len = len(data) * 4 - start if length is None else length
+
+    @classmethod
+    def from_codes(cls, codes):
+        codes = np.asarray(codes, dtype=np.uint8)
+        if codes.size and codes.max() > 3:
+            raise ValueError("PackedSeq holds A/C/G/T only")
+        n = len(codes)
+        padded = np.zeros((n + 3) // 4 * 4, dtype=np.uint8)
+        padded[:n] = codes
+        quads = padded.reshape(-1, 4)
+        data = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+        return cls(data, 0, n)
+
+    @classmethod
+    def from_str(cls, seq):
+        return cls.from_codes(encode(seq))
+
+    def codes(self):
+        lo = self._start // 4
+        hi = (self._start + self._len + 3) // 4
+        unpacked = ((self._data[lo:hi, None] >> _SHIFTS) & 3).ravel()
+        off = self._start - lo * 4
+        return unpacked[off:off + self._len]
+
+    @property
+    def data(self):
+        """The packed bytes backing this sequence (shared with its slices)."""
+        return self._data
+
+    @property
+    def nbytes(self):
+        return (self._start % 4 + self._len + 3) // 4
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._len)
+            if step != 1:
+                # the normalised stop of a reverse slice can be -1; slice with the key itself
+                return PackedSeq.from_codes(self.codes()[key])
+            return PackedSeq(self._data, self._start + start, max(stop - start, 0))
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("PackedSeq index out of range")
+        pos = self._start + key
+        return BASES[(int(self._data[pos // 4]) >> (6 - 2 * (pos % 4))) & 3]
+
+    def __str__(self):
+        return decode(self.codes())
+
+    def __repr__(self):
+        s = str(self) if self._len <= 40 else str(self[:37]) + "..."
+        return f"PackedSeq({s!r}, len={self._len})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedSeq):
+            return NotImplemented
+        return self._len == other._len and np.array_equal(self.codes(), other.codes())
+
+    def __hash__(self):
+        return hash(self.codes().tobytes())
+
+    def reverse_complement(self):
+        return PackedSeq.from_codes(3 - self.codes()[::-1])
+
+    def kmers(self, k, canonical=False):
+        return kmer_codes(self.codes(), k, canonical)
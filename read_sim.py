@@ -0,0 +1,166 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from packed_seq import DECODE, INVALID, encode
+
+BATCH_READS = 1 << 16
+MAX_QUALITY = 41
+ERROR_QUALITY = 8  # substituted and inserted bases
+PHRED_OFFSET = 33
+
+
+def worker_seeds(seed, n):
+    """Independent, reproducible child seeds, one per worker or shard."""
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+class ReadBatch:
+    """Reads as one code array (0..3) cut by `offsets`, plus a Phred score per base."""
+
+    __slots__ = ("codes", "offsets", "quals")
+
+    def __init__(self, codes, offsets, quals):
+        self.codes = codes
+        self.offsets = offsets
+        self.quals = quals
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def seqs(self):
+        text = DECODE[self.codes].tobytes().decode("ascii")
+        off = self.offsets.tolist()
+        return [text[a:b] for a, b in zip(off[:-1], off[1:])]
+
+    def _records(self, first, prefix, fastq):
+        seq = DECODE[self.codes].tobytes()
+        qual = (self.quals + PHRED_OFFSET).tobytes() if fastq else None
+        off = self.offsets.tolist()
+        head = "@" if fastq else ">"
+        out = []
+        for i, (a, b) in enumerate(zip(off[:-1], off[1:]), first):
+            out.append(f"{head}{prefix}_{i}\n".encode("ascii"))
+            out.append(seq[a:b])
+            if fastq:
+                out.append(b"\n+\n")
+                out.append(qual[a:b])
+            out.append(b"\n")
+        return b"".join(out)
+
+    def to_fasta(self, first=1, prefix="read"):
+        return self._records(first, prefix, False)
+
+    def to_fastq(self, first=1, prefix="read"):
+        return self._records(first, prefix, True)
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class ReadSimulator:
+    """Reads of uniform random length and position on an A/C/G/T genome, with
+    optional reverse-complement strands and per-base substitution, insertion
+    and deletion rates; every draw is done for a whole batch at once."""
+
+    def __init__(self, genome, min_len, max_len, both_strands=False,
+                 sub_rate=0.0, ins_rate=0.0, del_rate=0.0, seed=None):
+        genome = encode(genome) if isinstance(genome, (str, bytes, bytearray)) else np.asarray(genome, np.uint8)
+        if (genome == INVALID).any():
+            raise ValueError("genome must be A/C/G/T only")
+        self.span = len(genome)
+        # forward strand followed by its reverse complement
+        self.source = np.concatenate([genome, 3 - genome[::-1]]) if both_strands else genome
+        if not 1 <= min_len <= max_len:
+            raise ValueError("need 1 <= min_len <= max_len")
+        if max_len > self.span:
+            raise ValueError(f"reads of {max_len} bases do not fit a {self.span} bp genome")
+        self.min_len = min_len
+        self.max_len = max_len
+        self.both_strands = both_strands
+        self.sub_rate = sub_rate
+        self.ins_rate = ins_rate
+        self.del_rate = del_rate
+        error = sub_rate + ins_rate + del_rate
+        self.quality = MAX_QUALITY if error <= 0 else int(min(MAX_QUALITY, max(2, round(-10 * math.log10(error)))))
+        self.rng = np.random.default_rng(seed)
+
+    def _error_sites(self, total, rate):
+        """Sorted distinct positions of the bases hit by an error of `rate`."""
+        hits = self.rng.binomial(total, rate)
+        return np.unique(self.rng.integers(0, total, hits))
+
+    def batch(self, n):
+        rng = self.rng
+        lengths = rng.integers(self.min_len, self.max_len + 1, n)
+        starts = rng.integers(0, self.span - lengths + 1)
+        if self.both_strands:
+            # a reverse read is a forward read of the reverse complement half
+            rev = rng.random(n) < 0.5
+            starts = np.where(rev, 2 * self.span - starts - lengths, starts)
+        offsets = _offsets(lengths)
+        codes = self.source[np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])]
+        quals = np.full(len(codes), self.quality, dtype=np.uint8)
+        if self.sub_rate > 0:
+            sub = self._error_sites(len(codes), self.sub_rate)
+            codes[sub] = (codes[sub] + rng.integers(1, 4, len(sub))) % 4
+            quals[sub] = ERROR_QUALITY
+        if self.del_rate > 0:
+            gone = self._error_sites(len(codes), self.del_rate)
+            lengths = lengths - np.bincount(np.searchsorted(offsets, gone, "right") - 1, minlength=n)
+            codes = np.delete(codes, gone)
+            quals = np.delete(quals, gone)
+            offsets = _offsets(lengths)
+        if self.ins_rate > 0:
+            # a random base is inserted after each chosen position
+            after = self._error_sites(len(codes), self.ins_rate)
+            lengths = lengths + np.bincount(np.searchsorted(offsets, after, "right") - 1, minlength=n)
+            codes = np.insert(codes, after + 1, rng.integers(0, 4, len(after)).astype(np.uint8))
+            quals = np.insert(quals, after + 1, ERROR_QUALITY)
+            offsets = _offsets(lengths)
+        return ReadBatch(codes, offsets, quals)
+
+    def batches(self, n, batch_reads=BATCH_READS):
+        """Yield ReadBatch objects with `n` reads in total."""
+        while n > 0:
+            b = min(n, batch_reads)
+            yield self.batch(b)
+            n -= b
+
+    def reads(self, n, batch_reads=BATCH_READS):
+        """Yield `n` reads as str."""
+        for batch in self.batches(n, batch_reads):
+            yield from batch.seqs()
+
+    def write(self, path, n, fastq=False, prefix="read", first=1, batch_reads=BATCH_READS):
+        """Stream `n` reads to a FASTA (or FASTQ) file, one write per batch."""
+        with open(path, "wb") as f:
+            for batch in self.batches(n, batch_reads):
+                f.write(batch.to_fastq(first, prefix) if fastq else batch.to_fasta(first, prefix))
+                first += len(batch)
+        return path
+
+
+def _write_shard(genome, min_len, max_len, options, seed, path, n, fastq, prefix, first):
+    ReadSimulator(genome, min_len, max_len, seed=seed, **options).write(path, n, fastq, prefix, first)
+    return path
+
+
+def simulate_shards(genome, n, paths, min_len, max_len, seed=None, fastq=False, prefix="read", workers=None, **options):
+    """Write `n` reads split over `paths`, one process per shard. Shard i uses
+    the i-th child of `seed`, so the output does not depend on `workers`;
+    read names run on across shards."""
+    sizes = [n // len(paths) + (i < n % len(paths)) for i in range(len(paths))]
+    firsts = np.concatenate(([1], np.cumsum(sizes)[:-1] + 1)).tolist()
+    seeds = worker_seeds(seed, len(paths))
+    genome = encode(genome) if isinstance(genome, (str, bytes, bytearray)) else genome
+    args = [(genome, min_len, max_len, options, s, p, c, fastq, prefix, f)
+            for s, p, c, f in zip(seeds, paths, sizes, firsts)]
+    if workers == 1 or len(paths) == 1:
+        return [_write_shard(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [f.result() for f in [pool.submit(_write_shard, *a) for a in args]]
@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+from fasta_io import CHUNK_SIZE, open_binary
+
+# Alphabet classes: every input byte maps to one bit (whitespace to 0), and a
+# record's mask is the OR of the classes it contains.
+NUC = 1        # A C G (DNA, RNA and protein)
+T = 2          # DNA and protein
+U = 4          # RNA only
+PROTEIN = 8    # protein-only letters
+OTHER = 16     # anything else: the record is Unknown
+
+WHITESPACE = b" \t\r\n\v\f"
+
+
+def _class_table():
+    table = bytearray([OTHER]) * 256
+    for b in WHITESPACE:
+        table[b] = 0
+    for letters, bit in ((b"ACG", NUC), (b"T", T), (b"U", U), (b"DEFHIKLMNPQRSVWY", PROTEIN)):
+        for b in letters:
+            table[b] = bit
+            table[b + 32] = bit
+    return bytes(table)
+
+
+CLASS_TABLE = _class_table()
+_BITS = [(bit, bytes([bit])) for bit in (NUC, T, U, PROTEIN, OTHER)]
+
+SeqType = namedtuple("SeqType", "name length mask kind")
+
+
+def kind_of(mask):
+    """DNA / RNA / Protein / Unknown, with the same rules as detectSeq."""
+    if mask & OTHER or (mask & U and mask & (T | PROTEIN)):
+        return "Unknown"
+    if mask & PROTEIN:
+        return "Protein"
+    if mask & U:
+        return "RNA"
+    return "DNA"
+
+
+def alphabet_mask(data):
+    """Class mask of a bytes-like sequence: one translate plus a memchr per class."""
+    mapped = bytes(data).translate(CLASS_TABLE)
+    mask = 0
+    for bit, b in _BITS:
+        if b in mapped:
+            mask |= bit
+    return mask
+
+
+class _Record:
+    __slots__ = ("name", "length", "mask", "settled")
+
+    def __init__(self, name):
+        self.name = name
+        self.length = 0
+        self.mask = 0
+        self.settled = False
+
+    def feed(self, seg):
+        if self.settled:
+            self.length += len(seg) - sum(seg.count(w) for w in WHITESPACE)
+            return
+        mapped = seg.translate(CLASS_TABLE)
+        self.length += len(mapped) - mapped.count(0)
+        for bit, b in _BITS:
+            # bits already set need no rescan; present bits are found early
+            if not self.mask & bit and b in mapped:
+                self.mask |= bit
+        # Unknown can not change any more: skip the rest of the record
+        self.settled = kind_of(self.mask) == "Unknown"
+
+    def result(self):
+        return SeqType(self.name, self.length, self.mask, kind_of(self.mask))
+
+
+def classify_fasta(path, chunk_size=CHUNK_SIZE):
+    """Yield a SeqType per record of a (possibly gzip/BGZF) FASTA file,
+    scanning it in chunks without building the sequences."""
+    rec = None
+    header = None
+    at_line_start = True
+    with open_binary(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            pos = 0
+            n = len(chunk)
+            while pos < n:
+                if header is not None:
+                    nl = chunk.find(b"\n", pos)
+                    if nl < 0:
+                        header.append(chunk[pos:])
+                        pos = n
+                        at_line_start = False
+                        break
+                    header.append(chunk[pos:nl])
+                    rec = _Record(b"".join(header).decode("utf-8", "replace").strip())
+                    header = None
+                    pos = nl + 1
+                    at_line_start = True
+                    continue
+                if at_line_start and chunk[pos] == 0x3E:  # '>'
+                    if rec is not None:
+                        yield rec.result()
+                        rec = None
+                    header = []
+                    pos += 1
+                    continue
+                nxt = chunk.find(b"\n>", pos)
+                end = n if nxt < 0 else nxt + 1
+                if rec is None:
+                    rec = _Record("")
+                rec.feed(chunk[pos:end])
+                at_line_start = chunk[end - 1] == 0x0A
+                pos = end
+    if header is not None:
+        rec = _Record(b"".join(header).decode("utf-8", "replace").strip())
+    if rec is not None:
+        yield rec.result()
+
+
+def classify_files(paths, chunk_size=CHUNK_SIZE):
+    """Yield (path, SeqType) for every record of every file."""
+    for path in paths:
+        for rec in classify_fasta(path, chunk_size):
+            yield path, rec
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from packed_seq import PackedSeq
+
+SEQ = "ACGTTGCAAGT"
+
+
+def test_reverse_slices_match_str():
+    ps = PackedSeq.from_str(SEQ)
+    for key in (slice(None, None, -1), slice(3, None, -1), slice(None, 2, -1), slice(8, 1, -2),
+                slice(-1, -6, -1), slice(None, None, -3)):
+        assert str(ps[key]) == SEQ[key]
+
+
+def test_stepped_slices_of_a_view():
+    view = PackedSeq.from_str(SEQ)[2:9]
+    assert str(view[::-1]) == SEQ[2:9][::-1]
+    assert str(view[::2]) == SEQ[2:9][::2]
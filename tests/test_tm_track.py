@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from tm_track import TmTrack
+
+
+def test_lowercase_bases_mask_their_windows():
+    track = TmTrack("ACGTacgtACGT")
+    assert sum(len(starts) for _, starts, _, _ in track.iter_chunks([4])) == 2
+    rows = track.rows([4])
+    assert rows[0:len(rows)]["start"].tolist() == [1, 9]
+
+
+def test_rows_are_ordered_by_start_then_length():
+    seq = "ACGTNACGTTA"
+    rows = TmTrack(seq).rows([2, 3], chunk=3)
+    expected = [(s + 1, w) for s in range(len(seq)) for w in (2, 3)
+                if s + w <= len(seq) and "N" not in seq[s:s + w]]
+    got = rows[0:len(rows)]
+    assert list(zip(got["start"].tolist(), got["window"].tolist())) == expected
+    assert rows.first_at(5) == expected.index((6, 2))
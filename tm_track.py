@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+from base_windows import BaseWindows
+
+NA = 0.0001
+CHUNK_WINDOWS = 1 << 20
+
+# one record per window in binary output; read back with np.fromfile(path, TM_DTYPE)
+TM_DTYPE = np.dtype([("window", "<u2"), ("start", "<u8"), ("tm_simple", "<i4"), ("tm_advanced", "<f8")])
+
+
+def parse_windows(text):
+    """"8", "18-30" or "12,18-20" -> sorted list of window lengths."""
+    out = set()
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        lo = int(lo)
+        hi = int(hi) if hi else lo
+        if lo <= 0 or hi < lo:
+            raise ValueError(f"Invalid window range: {part}")
+        out.update(range(lo, hi + 1))
+    if not out:
+        raise ValueError("No window length given.")
+    return sorted(out)
+
+
+def tm_simple(gc, at):
+    """Wallace rule, 4 degrees per G/C and 2 per A/T."""
+    return 4 * gc + 2 * at
+
+
+def tm_advanced(gc, length, na=NA):
+    gc_percent = gc / length * 100
+    return -(81.5 + 16.6 * math.log10(na) + 0.41 * gc_percent - 600 / length)
+
+
+def tm_records(length, starts, simple, adv):
+    rec = np.empty(len(starts), dtype=TM_DTYPE)
+    rec["window"] = length
+    rec["start"] = starts
+    rec["tm_simple"] = simple
+    rec["tm_advanced"] = adv
+    return rec
+
+
+class TmTrack:
+    """Tm of every A/C/G/T-only window for one or more window lengths,
+    computed from one set of per-base prefix sums."""
+
+    def __init__(self, seq, na=NA):
+        self.seq = np.frombuffer(seq.encode("ascii") if isinstance(seq, str) else bytes(seq), dtype=np.uint8)
+        # only upper-case A/C/G/T count: a soft-masked (lower-case) base
+        # invalidates its windows, as any other symbol does
+        acgt = np.isin(self.seq, np.frombuffer(b"ACGT", dtype=np.uint8))
+        self.gaps = np.flatnonzero(~acgt)
+        self.windows = BaseWindows(np.where(acgt, self.seq, ord("N")).astype(np.uint8))
+        self.na = na
+
+    def __len__(self):
+        return len(self.windows)
+
+    def iter_chunks(self, lengths, chunk=CHUNK_WINDOWS):
+        """Yield (length, starts, tm_simple, tm_advanced) per chunk of window
+        starts and length; starts are 1-based, masked windows are dropped."""
+        n = len(self.windows)
+        for lo in range(0, n, chunk):
+            for w in lengths:
+                hi = min(lo + chunk, n - w + 1)
+                if hi <= lo:
+                    continue
+                a, c, g, t = self.windows.range_counts(w, lo, hi)
+                gc = c + g
+                at = a + t
+                valid = np.flatnonzero(gc + at == w)
+                gc = gc[valid]
+                yield (w, valid + lo + 1, tm_simple(gc, at[valid]), tm_advanced(gc, w, self.na))
+
+    def rows(self, lengths, chunk=CHUNK_WINDOWS):
+        """All windows as a lazy TmRows, ordered by start then window length."""
+        return TmRows(self, lengths, chunk)
+
+    def window_seqs(self, starts, length):
+        """Window sequences (bytes) for 1-based starts, without a Python slice each."""
+        view = np.lib.stride_tricks.sliding_window_view(self.seq, length)
+        return view[np.asarray(starts) - 1].copy().view(f"S{length}").ravel()
+
+    def write_csv(self, path, lengths, with_seq=True, chunk=CHUNK_WINDOWS):
+        """Stream every window to CSV, one chunk of rows per write; returns the row count."""
+        rows = 0
+        with open(path, "w", encoding="ascii", newline="") as f:
+            f.write("window,start,sequence,tm_simple,tm_advanced\n" if with_seq
+                    else "window,start,tm_simple,tm_advanced\n")
+            for w, starts, simple, adv in self.iter_chunks(lengths, chunk):
+                if not len(starts):
+                    continue
+                cols = [starts.tolist(), simple.tolist(), np.round(adv, 2).tolist()]
+                if with_seq:
+                    seqs = self.window_seqs(starts, w).astype(str).tolist()
+                    f.write("".join(f"{w},{s},{q},{a},{b}\n" for s, q, a, b in zip(cols[0], seqs, cols[1], cols[2])))
+                else:
+                    f.write("".join(f"{w},{s},{a},{b}\n" for s, a, b in zip(*cols)))
+                rows += len(starts)
+        return rows
+
+    def write_binary(self, path, lengths, chunk=CHUNK_WINDOWS):
+        """Stream every window as TM_DTYPE records; returns the record count."""
+        rows = 0
+        with open(path, "wb") as f:
+            for w, starts, simple, adv in self.iter_chunks(lengths, chunk):
+                rec = tm_records(w, starts, simple, adv)
+                rec.tofile(f)
+                rows += len(rec)
+        return rows
+
+
+class TmRows:
+    """The valid windows of a TmTrack as a sequence of TM_DTYPE rows, ordered
+    by start then length. Only the row offset of each start is kept; a slice
+    computes its Tm values from the prefix sums when it is asked for."""
+
+    def __init__(self, track, lengths, chunk=CHUNK_WINDOWS):
+        self.track = track
+        self.lengths = np.array(sorted(lengths), dtype=np.int64)
+        n = len(track)
+        # every window up to the next masked base (or the end) is valid, so
+        # the valid lengths at a start are a prefix of the sorted lengths
+        stops = np.append(track.gaps, n)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        for lo in range(0, n, chunk):
+            s = np.arange(lo, min(lo + chunk, n))
+            room = stops[np.searchsorted(track.gaps, s)] - s
+            self.offsets[lo + 1:lo + 1 + len(s)] = np.searchsorted(self.lengths, room, side="right")
+        np.cumsum(self.offsets, out=self.offsets)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("TmRows only supports slicing")
+        idx = np.arange(*key.indices(len(self)))
+        s = np.searchsorted(self.offsets, idx, side="right") - 1
+        w = self.lengths[idx - self.offsets[s]]
+        prefix = self.track.windows.prefix
+        a, c, g, t = prefix[:, s + w] - prefix[:, s]
+        gc = c + g
+        return tm_records(w, s + 1, tm_simple(gc, a + t), tm_advanced(gc, w, self.track.na))
+
+    def first_at(self, position):
+        """Row index of the first window starting at or after `position` (1-based)."""
+        return int(self.offsets[min(max(position - 1, 0), len(self.offsets) - 1)])
+
+    def filter(self, column, lo=None, hi=None, chunk=CHUNK_WINDOWS):
+        """TM_DTYPE array of the rows whose `column` lies within [lo, hi]."""
+        parts = []
+        for i in range(0, len(self), chunk):
+            rec = self[i:i + chunk]
+            mask = np.ones(len(rec), dtype=bool)
+            if lo is not None:
+                mask &= rec[column] >= lo
+            if hi is not None:
+                mask &= rec[column] <= hi
+            parts.append(rec[mask])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=TM_DTYPE)